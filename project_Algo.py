@@ -1,14 +1,1016 @@
 # db_sikampus.py
+import atexit
+import functools
+import logging
+import os
+import queue
+import re
+import shutil
 import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
 
-DATABASE_NAME = 'sikampus_db.sqlite'
+DATABASE_NAME = 'sikampus_db.sqlite'  # Path file atau URI 'file:' (lihat memory_database)
 PROJECT_COST_PER_CREDIT = 200000  # Biaya Proyek Simulasi per SKS
+BUSY_TIMEOUT_MS = 5000  # Waktu tunggu (ms) saat database dikunci penulis lain
+STATEMENT_CACHE_SIZE = 128  # Jumlah prepared statement yang di-cache per koneksi
+WRITE_QUEUE_ENABLED = False  # Aktifkan penulis group-commit untuk lonjakan registrasi
+WRITE_QUEUE_BATCH_SIZE = 32  # Maksimal permintaan per commit
+WRITE_QUEUE_FLUSH_MS = 5  # Waktu tunggu maksimal (ms) sebelum batch di-commit
+READ_CACHE_MAX_ENTRIES = 256  # Batas entri cache baca (LRU)
+REGISTRATION_PAGE_SIZE = 50  # Jumlah baris per halaman daftar registrasi
+SEARCH_LIMIT = 20  # Jumlah hasil pencarian teratas yang ditampilkan
+SLOW_QUERY_MS = 200  # Statement yang lebih lama dari ini masuk slow-query log
+SLOW_QUERY_LOG = 'sikampus_slow_queries.log'
+QUERY_STATS_SAMPLES = 500  # Sampel durasi yang disimpan per bentuk kueri
+IN_LIST_BATCH_SIZE = 500  # Parameter per daftar IN (jauh di bawah batas variabel SQLite)
+READ_SNAPSHOT_ENABLED = False  # Arahkan analitik & daftar staf ke salinan snapshot database
+READ_SNAPSHOT_MAX_AGE_S = 30  # Umur maksimal snapshot (detik) sebelum disalin ulang
+READ_SNAPSHOT_MAX_WRITES = 200  # Jumlah commit di proses ini sebelum snapshot disalin ulang
+MEMORY_DATABASE_ENABLED = False  # Sajikan data dari RAM (demo): dimuat dari & disimpan berkala ke DATABASE_NAME
+MEMORY_DATABASE_NAME = 'sikampus'
+PERSIST_INTERVAL_S = 60  # Jarak (detik) penyimpanan berkala database memori ke disk
+SCRATCH_IN_MEMORY = True  # scratch_database(): uji & benchmark di RAM, terisolasi dan tanpa file sisa
 
-def init_db():
-    """Menginisialisasi tabel database dan mengisi data awal."""
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
+# Koneksi disimpan per thread karena Streamlit menjalankan skrip di worker thread
+_local = threading.local()
+
+# --- Instrumentasi kueri ---
+slow_query_log = logging.getLogger('sikampus.slow_query')
+_query_hook = None  # callable(conn, record) atau None (tanpa overhead selain satu cek)
+_query_samples = {}  # bentuk kueri -> (jumlah panggilan, deque durasi ms)
+_query_stats_lock = threading.Lock()
+_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_PATTERN = re.compile(r"IN \((?:\?, )*\?\)")
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(query):
+    """Bentuk kueri: spasi dirapikan, literal diganti '?' dan daftar IN diringkas."""
+    shape = _LITERAL_PATTERN.sub("?", " ".join(query.split()))
+    return _IN_LIST_PATTERN.sub("IN (...)", shape)
+
+def percentile(sorted_values, fraction):
+    """Nilai persentil (0..1) dari daftar yang sudah terurut."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def _report_query(conn, query, params, elapsed, rows):
+    hook = _query_hook
+    if hook is not None:
+        hook(conn, {
+            'sql': query,
+            'params': params,
+            'shape': normalize_sql(query),
+            'ms': elapsed * 1000,
+            'rows': rows,
+            'view': getattr(_local, 'view', None) or '-',
+        })
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Kursor yang melaporkan statement setelah barisnya selesai diambil (waktu execute + fetch)."""
+
+    _pending = None  # [sql, params, detik, jumlah baris] selama hasil belum habis dibaca
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._begin(sql, parameters, time.perf_counter() - started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._begin(sql, None, time.perf_counter() - started)
+        return self
+
+    def _begin(self, sql, params, elapsed):
+        if self.description is None:
+            _report_query(self.connection, sql, params, elapsed, self.rowcount)
+        else:
+            self._pending = [sql, params, elapsed, 0]
+
+    def _timed(self, fetch, *args):
+        pending = self._pending
+        if pending is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            pending[2] += time.perf_counter() - started
+
+    def _finish(self, rows=0):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, elapsed, counted = pending
+            _report_query(self.connection, sql, params, elapsed, counted + rows)
+
+    def _count(self, rows):
+        if self._pending is not None:
+            self._pending[3] += rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._finish(len(rows))
+        return rows
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._count(1)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if len(rows) < size:
+            self._finish(len(rows))
+        else:
+            self._count(len(rows))
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._count(1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Hasil yang tidak dibaca sampai habis (mis. satu fetchone) dilaporkan saat kursor dilepas.
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Koneksi yang melaporkan setiap statement (dan commit) ke hook kueri bila hook aktif."""
+
+    def execute(self, sql, parameters=()):
+        if _query_hook is None:
+            return super().execute(sql, parameters)
+        return self.cursor(InstrumentedCursor).execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if _query_hook is None:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor(InstrumentedCursor).executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if _query_hook is None or not self.in_transaction:
+            return super().commit()
+        started = time.perf_counter()
+        super().commit()
+        _report_query(self, "COMMIT", None, time.perf_counter() - started, 0)
+
+def set_query_hook(hook):
+    """Memasang hook(conn, record) untuk setiap statement; None untuk mematikan."""
+    global _query_hook
+    _query_hook = hook
+
+@contextmanager
+def query_view(name):
+    """Menandai statement di dalam blok ini sebagai milik tampilan `name`."""
+    previous = getattr(_local, 'view', None)
+    _local.view = name
+    try:
+        yield
+    finally:
+        _local.view = previous
+
+def _log_slow_query(conn, record):
+    plan = []
+    if record['params'] is not None and record['shape'].upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')):
+        try:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + record['sql'], record['params']).fetchall()
+            plan = [row[3] for row in rows]
+        except sqlite3.Error:
+            pass
+    slow_query_log.warning(
+        "%.1f ms | %s baris | view=%s | %s | plan: %s",
+        record['ms'], record['rows'], record['view'], record['shape'], ' | '.join(plan) or '-'
+    )
+
+def _collect_query_stats(conn, record):
+    with _query_stats_lock:
+        calls, samples = _query_samples.get(record['shape'], (0, None))
+        if samples is None:
+            samples = deque(maxlen=QUERY_STATS_SAMPLES)
+        samples.append(record['ms'])
+        _query_samples[record['shape']] = (calls + 1, samples)
+
+    render_log = getattr(_local, 'render_log', None)
+    if render_log is not None:
+        render_log.append((record['view'], record['shape'], record['ms'], record['rows']))
+    if record['ms'] >= SLOW_QUERY_MS:
+        _log_slow_query(conn, record)
+
+def enable_query_stats(slow_query_ms=None, log_path=SLOW_QUERY_LOG):
+    """Menyalakan statistik kueri dan slow-query log (aman dipanggil berulang kali)."""
+    global SLOW_QUERY_MS
+    if slow_query_ms is not None:
+        SLOW_QUERY_MS = slow_query_ms
+    if log_path and not slow_query_log.handlers:
+        handler = logging.FileHandler(log_path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_log.addHandler(handler)
+    set_query_hook(_collect_query_stats)
+
+def begin_render():
+    """Memulai log statement untuk satu render halaman di thread ini."""
+    _local.render_log = []
+
+def render_query_summary():
+    """Total statement dan waktu (ms) untuk render saat ini, juga per tampilan."""
+    render_log = getattr(_local, 'render_log', None) or []
+    by_view = {}
+    for view, _, ms, _ in render_log:
+        count, total = by_view.get(view, (0, 0.0))
+        by_view[view] = (count + 1, total + ms)
+    return {
+        'statements': len(render_log),
+        'total_ms': sum(entry[2] for entry in render_log),
+        'by_view': by_view,
+    }
+
+def query_stats():
+    """Statistik per bentuk kueri: jumlah panggilan serta p50/p95/p99 durasi (ms)."""
+    with _query_stats_lock:
+        snapshot = [(shape, calls, sorted(samples)) for shape, (calls, samples) in _query_samples.items()]
+    stats = [
+        {
+            'shape': shape,
+            'calls': calls,
+            'p50_ms': round(percentile(samples, 0.50), 3),
+            'p95_ms': round(percentile(samples, 0.95), 3),
+            'p99_ms': round(percentile(samples, 0.99), 3),
+            'max_ms': round(samples[-1], 3),
+        }
+        for shape, calls, samples in snapshot
+    ]
+    return sorted(stats, key=lambda row: row['p95_ms'] * row['calls'], reverse=True)
+
+def reset_query_stats():
+    """Menghapus semua statistik kueri yang terkumpul."""
+    with _query_stats_lock:
+        _query_samples.clear()
+
+def get_connection():
+    """Mengambil koneksi SQLite milik thread ini; dibuat dan dikonfigurasi sekali saja."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.db_name == DATABASE_NAME:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    _anchor_memory_database()
+    conn = _connect(
+        DATABASE_NAME,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=InstrumentedConnection,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")  # Database memori tetap memakai jurnal di memori
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA foreign_keys=ON")
+    _local.conn = conn
+    _local.db_name = DATABASE_NAME
+    return conn
+
+def close_connection():
+    """Menutup koneksi milik thread ini (misalnya saat thread selesai)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+    snapshot_conn = getattr(_local, 'snapshot_conn', None)
+    if snapshot_conn is not None:
+        snapshot_conn.close()
+        _local.snapshot_conn = None
+
+def set_database(name):
+    """Mengarahkan db layer ke database lain: path file atau URI (misalnya memory_database())."""
+    global DATABASE_NAME
+    DATABASE_NAME = name
+    close_connection()
+    clear_read_cache()
+
+# --- Target database: file atau memori ---
+# Database memori memakai VFS memdb dengan nama berawalan '/', sehingga semua koneksi
+# di proses ini berbagi satu database dan tetap memakai kunci biasa (busy_timeout
+# berlaku). Mode cache=shared hanya dipakai pada SQLite lama: kunci tabelnya langsung
+# gagal dengan SQLITE_LOCKED tanpa menunggu.
+MEMORY_VFS_AVAILABLE = sqlite3.sqlite_version_info >= (3, 36, 0)
+_memory_anchor = None  # (target, koneksi) yang menahan database memori tetap ada
+_memory_lock = threading.Lock()
+
+def memory_database(name=MEMORY_DATABASE_NAME):
+    """URI database memori bernama yang bisa dibagi semua koneksi di proses ini."""
+    if MEMORY_VFS_AVAILABLE:
+        return f"file:/{name}?vfs=memdb"
+    return f"file:{name}?mode=memory&cache=shared"
+
+def is_memory_database(target=None):
+    """True bila target (bawaan: database aktif) adalah database memori."""
+    target = target or DATABASE_NAME
+    return target.startswith('file:') and ('vfs=memdb' in target or 'mode=memory' in target)
+
+def _connect(target, **kwargs):
+    """sqlite3.connect untuk path biasa maupun URI 'file:'."""
+    return sqlite3.connect(target, uri=target.startswith('file:'), **kwargs)
+
+def _anchor_memory_database():
+    """Database memori hilang saat koneksi terakhirnya ditutup; satu koneksi jangkar menahannya.
+
+    Beralih ke target lain melepas jangkar lama, jadi isi database memori itu dibuang
+    (simpan dulu dengan save_database bila perlu).
+    """
+    global _memory_anchor, _schema_ready_for, _version_probe
+    with _memory_lock:
+        if _memory_anchor is not None and _memory_anchor[0] == DATABASE_NAME:
+            return
+        if _memory_anchor is not None:
+            released, anchor = _memory_anchor
+            anchor.close()
+            _memory_anchor = None
+            # Nama yang sama nanti berarti database kosong baru: skema harus dibuat ulang
+            if _schema_ready_for == released:
+                _schema_ready_for = None
+            _search_ready.pop(released, None)
+            with _cache_lock:
+                if _version_probe is not None and _version_probe[0] == released:
+                    _version_probe[1].close()
+                    _version_probe = None
+        if is_memory_database():
+            _memory_anchor = (DATABASE_NAME, _connect(DATABASE_NAME, check_same_thread=False))
+
+@contextmanager
+def write_transaction():
+    """Menjalankan beberapa penulisan dalam satu transaksi BEGIN IMMEDIATE dan satu commit."""
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _bump_write_generation()
+
+# --- Cache baca bersama (publik & staf) ---
+# Entri cache ditandai dengan versi data saat dibaca: generasi tulis di proses ini
+# dan PRAGMA data_version dari koneksi pemantau (menangkap commit dari koneksi/proses lain).
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_write_generation = 0
+_version_probe = None
+
+def _bump_write_generation():
+    global _write_generation
+    with _cache_lock:
+        _write_generation += 1
+
+def data_version():
+    """Versi data saat ini; berubah setiap kali ada commit, dari mana pun asalnya."""
+    global _version_probe
+    with _cache_lock:
+        if _version_probe is None or _version_probe[0] != DATABASE_NAME:
+            if _version_probe is not None:
+                _version_probe[1].close()
+            probe = _connect(DATABASE_NAME, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+            _version_probe = (DATABASE_NAME, probe)
+        version = _version_probe[1].execute("PRAGMA data_version").fetchone()[0]
+        return (_write_generation, version)
+
+def cached_query(query, params=(), fetch_all=False, snapshot=False):
+    """Seperti execute_query (khusus SELECT), tetapi hasilnya di-cache sampai data berubah.
+
+    Dengan snapshot=True kueri dibaca dari snapshot baca (bila aktif) dan entri
+    cache berlaku sampai snapshot disalin ulang.
+    """
+    key = (query, tuple(params), fetch_all, snapshot)
+    version = snapshot_version() if snapshot else None
+    if version is None:
+        version = data_version()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(key)
+            _cache_stats['hits'] += 1
+            return entry[1]
+        _cache_stats['misses'] += 1
+
+    result = execute_query(query, params, fetch_all, snapshot=snapshot)
+    with _cache_lock:
+        _cache[key] = (version, result)
+        _cache.move_to_end(key)
+        while len(_cache) > READ_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+            _cache_stats['evictions'] += 1
+    return result
+
+def read_cache_stats():
+    """Statistik cache baca: hits, misses, evictions dan jumlah entri."""
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_cache))
+
+def clear_read_cache():
+    """Mengosongkan cache baca (statistik tetap dipertahankan)."""
+    with _cache_lock:
+        _cache.clear()
+
+# --- Snapshot baca (replika untuk analitik & daftar staf) ---
+# Salinan database utama dibuat dengan online backup API dan disalin ulang saat
+# dibaca bila umurnya melewati READ_SNAPSHOT_MAX_AGE_S atau sudah tertinggal
+# READ_SNAPSHOT_MAX_WRITES commit dari proses ini (commit proses lain dibatasi oleh
+# umur). Pembaca snapshot tidak memegang kunci di database utama, sehingga kueri
+# analitik yang panjang tidak bersaing dengan registrasi.
+# Setiap penyalinan menulis file baru (<base>.<generasi>) tanpa memegang
+# _snapshot_lock lalu ditukar masuk; selama itu pembaca lain tetap memakai
+# snapshot lama. File lama dihapus pada penukaran berikutnya (dicoba lagi bila
+# masih terbuka, misalnya di Windows).
+_snapshot = {
+    'source': None, 'base': None, 'path': None, 'generation': 0, 'taken_at': None,
+    'writes_at': 0, 'copy_ms': 0.0, 'retired': [],
+}
+_snapshot_lock = threading.Lock()
+_snapshot_copy_lock = threading.Lock()  # Satu penyalinan berjalan dalam satu waktu
+
+def enable_read_snapshot(path=None, max_age_s=None, max_writes=None):
+    """Menyalakan snapshot baca untuk database aktif dan membuat salinan pertamanya."""
+    global READ_SNAPSHOT_MAX_AGE_S, READ_SNAPSHOT_MAX_WRITES
+    if max_age_s is not None:
+        READ_SNAPSHOT_MAX_AGE_S = max_age_s
+    if max_writes is not None:
+        READ_SNAPSHOT_MAX_WRITES = max_writes
+    with _snapshot_lock:
+        _retire_snapshot_files(_snapshot['path'])
+        _snapshot.update(source=DATABASE_NAME, base=path or _default_snapshot_path(), path=None, taken_at=None)
+    refresh_snapshot()
+
+def disable_read_snapshot():
+    """Mematikan snapshot baca; semua kueri kembali ke database utama."""
+    with _snapshot_lock:
+        _retire_snapshot_files(_snapshot['path'])
+        _snapshot.update(source=None, base=None, path=None, taken_at=None)
+
+def _remove_snapshot_file(path):
+    """Menghapus file snapshot beserta file pendampingnya; False bila masih terbuka."""
+    try:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    except OSError:
+        return False
+    return True
+
+def _retire_snapshot_files(*paths, keep_latest=False):
+    """Memensiunkan file snapshot dan menghapus yang sudah pensiun.
+
+    keep_latest=True menyisakan file yang terakhir dipensiunkan untuk pembaca yang
+    baru saja mengambil path-nya; file itu dihapus pada penukaran berikutnya.
+    """
+    retired = _snapshot['retired'] + [path for path in paths if path is not None]
+    kept = retired[-1:] if keep_latest else []
+    candidates = retired[:-1] if keep_latest else retired
+    _snapshot['retired'] = [path for path in candidates if not _remove_snapshot_file(path)] + kept
+
+def _snapshot_is_stale():
+    if _snapshot['taken_at'] is None:
+        return True
+    age = time.time() - _snapshot['taken_at']
+    return age >= READ_SNAPSHOT_MAX_AGE_S or _write_generation - _snapshot['writes_at'] >= READ_SNAPSHOT_MAX_WRITES
+
+def refresh_snapshot(if_stale=False):
+    """Menyalin database utama ke file snapshot baru; dengan if_stale=True hanya bila sudah basi.
+
+    Bila salinan lain sedang dibuat dan snapshot lama masih ada, pemanggil
+    if_stale=True langsung kembali dan tetap membaca snapshot lama.
+    """
+    with _snapshot_lock:
+        if _snapshot['source'] != DATABASE_NAME or (if_stale and not _snapshot_is_stale()):
+            return
+        wait = not if_stale or _snapshot['taken_at'] is None
+    if not _snapshot_copy_lock.acquire(blocking=wait):
+        return
+    try:
+        with _snapshot_lock:
+            if _snapshot['source'] != DATABASE_NAME or (if_stale and not _snapshot_is_stale()):
+                return  # Sudah diperbarui oleh thread lain selama menunggu
+            source, generation = _snapshot['source'], _snapshot['generation'] + 1
+            path = f"{_snapshot['base']}.{generation}"
+        # Commit yang terjadi selama penyalinan ikut dihitung tertinggal
+        writes_at = _write_generation
+        started = time.perf_counter()
+        target = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            get_connection().backup(target)
+        finally:
+            target.close()
+        with _snapshot_lock:
+            if _snapshot['source'] != source:
+                _retire_snapshot_files(path)  # Snapshot dimatikan/diganti selama penyalinan
+                return
+            _retire_snapshot_files(_snapshot['path'], keep_latest=True)
+            _snapshot.update(
+                path=path,
+                generation=generation,
+                taken_at=time.time(),
+                writes_at=writes_at,
+                copy_ms=(time.perf_counter() - started) * 1000,
+            )
+    finally:
+        _snapshot_copy_lock.release()
+
+def _active_snapshot():
+    """Path snapshot yang segar untuk database aktif, atau None bila snapshot tidak dipakai."""
+    if _snapshot['source'] != DATABASE_NAME:
+        if not READ_SNAPSHOT_ENABLED:
+            return None
+        enable_read_snapshot()
+    refresh_snapshot(if_stale=True)
+    return _snapshot['path']
+
+def snapshot_version():
+    """Versi snapshot aktif (berubah setiap penyalinan), None bila snapshot tidak dipakai."""
+    path = _active_snapshot()
+    return None if path is None else ('snapshot', path, _snapshot['generation'])
+
+def get_read_connection():
+    """Koneksi baca untuk analitik dan daftar: snapshot (read-only) bila aktif, selain itu database utama."""
+    path = _active_snapshot()
+    if path is None:
+        return get_connection()
+    conn = getattr(_local, 'snapshot_conn', None)
+    if conn is not None and _local.snapshot_path == path:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    conn = sqlite3.connect(
+        Path(path).absolute().as_uri() + "?mode=ro",
+        uri=True,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=InstrumentedConnection,
+    )
+    _local.snapshot_conn = conn
+    _local.snapshot_path = path
+    return conn
+
+def snapshot_status():
+    """Status snapshot baca: aktif atau tidak, umur (detik), commit tertinggal dan durasi salin."""
+    with _snapshot_lock:
+        enabled = _snapshot['source'] == DATABASE_NAME and _snapshot['taken_at'] is not None
+        return {
+            'enabled': enabled,
+            'age_s': time.time() - _snapshot['taken_at'] if enabled else 0.0,
+            'writes_behind': _write_generation - _snapshot['writes_at'] if enabled else 0,
+            'copy_ms': _snapshot['copy_ms'],
+            'max_age_s': READ_SNAPSHOT_MAX_AGE_S,
+            'max_writes': READ_SNAPSHOT_MAX_WRITES,
+        }
+
+def _default_snapshot_path():
+    if is_memory_database():
+        return os.path.join(tempfile.gettempdir(), re.sub(r"\W+", "_", DATABASE_NAME).strip("_") + ".snapshot")
+    return f"{DATABASE_NAME}.snapshot"
+
+# --- Simpan/muat database lewat backup API ---
+# Dipakai untuk database memori: isi awal dimuat dari file, lalu disalin balik ke
+# file secara berkala oleh thread penyimpan (hanya bila ada commit baru).
+_persist = {'path': None, 'source': None, 'saved_at': None, 'save_ms': 0.0, 'saves': 0}
+_persist_thread = None
+_persist_stop = threading.Event()
+_persist_lock = threading.Lock()
+_memory_switch_lock = threading.Lock()
+
+def save_database(path):
+    """Menyalin database aktif ke file `path` lewat backup API; mengembalikan durasi (ms).
+
+    Penyalinan berjalan dalam satu transaksi di file tujuan, jadi pembaca file itu
+    tidak pernah melihat salinan setengah jadi.
+    """
+    started = time.perf_counter()
+    target = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        get_connection().backup(target)
+    finally:
+        target.close()
+    return (time.perf_counter() - started) * 1000
+
+def load_database(path):
+    """Mengganti isi database aktif dengan salinan file `path` (backup API), lalu memigrasikannya.
+
+    Backup ikut menyalin penanda WAL di header, padahal database memori tidak bisa
+    memakai WAL; file WAL karena itu disalin dulu ke file sementara berjurnal biasa.
+    """
+    global _schema_ready_for
+    source = sqlite3.connect(Path(path).absolute().as_uri() + "?mode=ro", uri=True, timeout=BUSY_TIMEOUT_MS / 1000)
+    staging_dir = None
+    try:
+        if is_memory_database() and source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+            staging_dir = tempfile.mkdtemp(prefix='sikampus_load_')
+            staged = sqlite3.connect(os.path.join(staging_dir, 'load.sqlite'))
+            source.backup(staged)
+            staged.execute("PRAGMA journal_mode=DELETE")
+            source.close()
+            source = staged
+        source.backup(get_connection())
+    finally:
+        source.close()
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    _bump_write_generation()
+    clear_read_cache()
+    _schema_ready_for = None
+    init_db()
+
+def _persist_once(last_version):
+    """Menyimpan ke file persistensi bila data berubah sejak `last_version`; mengembalikan versi terbaru."""
+    if _persist['source'] != DATABASE_NAME:
+        return last_version
+    version = data_version()
+    if version != last_version:
+        save_ms = save_database(_persist['path'])
+        _persist.update(saved_at=time.time(), save_ms=save_ms, saves=_persist['saves'] + 1)
+    return version
+
+def _run_persistence(interval_s):
+    last_version = data_version()
+    while not _persist_stop.wait(interval_s):
+        try:
+            last_version = _persist_once(last_version)
+        except sqlite3.Error:
+            logging.getLogger('sikampus.persist').exception("Gagal menyimpan database ke %s", _persist['path'])
+    _persist_once(last_version)
+    close_connection()
+
+def start_persistence(path, interval_s=PERSIST_INTERVAL_S):
+    """Menyalakan thread yang menyimpan database aktif ke `path` setiap interval_s detik (sekali per proses)."""
+    global _persist_thread
+    with _persist_lock:
+        if _persist_thread is not None:
+            return
+        _persist.update(path=path, source=DATABASE_NAME)
+        _persist_stop.clear()
+        _persist_thread = threading.Thread(
+            target=_run_persistence, args=(interval_s,), name='sikampus-persist', daemon=True
+        )
+        _persist_thread.start()
+        atexit.register(stop_persistence)
+
+def stop_persistence():
+    """Mematikan thread penyimpan setelah satu penyimpanan terakhir."""
+    global _persist_thread
+    with _persist_lock:
+        thread, _persist_thread = _persist_thread, None
+    if thread is not None:
+        _persist_stop.set()
+        thread.join()
+
+def persistence_status():
+    """Status penyimpanan berkala: file tujuan, umur simpanan terakhir (detik), durasi dan jumlah simpan."""
+    enabled = _persist_thread is not None and _persist['source'] == DATABASE_NAME
+    return {
+        'enabled': enabled,
+        'path': _persist['path'] if enabled else None,
+        'age_s': time.time() - _persist['saved_at'] if enabled and _persist['saved_at'] else None,
+        'save_ms': _persist['save_ms'],
+        'saves': _persist['saves'],
+    }
+
+def use_memory_database(name=MEMORY_DATABASE_NAME, load_from=None, persist_to=None, persist_interval_s=PERSIST_INTERVAL_S):
+    """Beralih ke database memori bernama, opsional dimuat dari file dan disimpan berkala ke file.
+
+    Tanpa `load_from` database memori dibuat kosong (skema dan data awal dari migrasi),
+    cocok untuk uji dan benchmark yang tidak boleh menyentuh disk.
+    """
+    set_database(memory_database(name))
+    if load_from and os.path.exists(load_from):
+        load_database(load_from)
+    init_db()
+    if persist_to:
+        start_persistence(persist_to, persist_interval_s)
+    return DATABASE_NAME
+
+@contextmanager
+def scratch_database(label, in_memory=None):
+    """Beralih ke database sementara yang bersih selama blok `with`, lalu kembali ke database sebelumnya.
+
+    Bawaannya (SCRATCH_IN_MEMORY) database memori bernama unik yang dibuang saat
+    blok selesai; in_memory=False membuat file di direktori sementara. Nilai yang
+    dihasilkan adalah target database itu (URI atau path file).
+    """
+    previous = DATABASE_NAME
+    try:
+        if SCRATCH_IN_MEMORY if in_memory is None else in_memory:
+            yield use_memory_database(f'{label}_{uuid.uuid4().hex[:8]}')
+        else:
+            path = os.path.join(tempfile.mkdtemp(prefix='sikampus_'), f'{label}.sqlite')
+            set_database(path)
+            init_db()
+            yield path
+    finally:
+        set_database(previous)
+
+def _ensure_memory_database():
+    """MEMORY_DATABASE_ENABLED: pindahkan DATABASE_NAME (file) ke RAM sekali per proses."""
+    with _memory_switch_lock:
+        if not is_memory_database():
+            database_file = DATABASE_NAME
+            use_memory_database(load_from=database_file, persist_to=database_file)
+
+# Indeks sekunder: filter/join pada module_id + status, cek duplikat,
+# filter status + reg_date dan urutan reg_date DESC
+SCHEMA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_modules_status_title ON Modules (status, title)",
+    "CREATE INDEX IF NOT EXISTS idx_reg_module_status ON ProjectRegistrations (module_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_reg_scholar_module_status ON ProjectRegistrations (scholar_id_fk, module_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_reg_status_date ON ProjectRegistrations (status, reg_date)",
+    "CREATE INDEX IF NOT EXISTS idx_reg_date ON ProjectRegistrations (reg_date)",
+    # Keyset pagination (reg_date, id) dengan filter modul (filter status: idx_reg_status_date)
+    "CREATE INDEX IF NOT EXISTS idx_reg_module_date ON ProjectRegistrations (module_id, reg_date)",
+]
+
+# Trigger yang menjaga Modules.registered_count tetap sama dengan jumlah kursi
+# terisi per modul (insert, ubah status/modul, delete). Setiap registrasi yang
+# bukan 'Canceled' menempati kursi: 'InProgress' dan 'Completed' tetap memegangnya.
+SCHEMA_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_reg_count_insert
+    AFTER INSERT ON ProjectRegistrations
+    WHEN NEW.status != 'Canceled'
+    BEGIN
+        UPDATE Modules SET registered_count = registered_count + 1 WHERE id = NEW.module_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_reg_count_update
+    AFTER UPDATE OF status, module_id ON ProjectRegistrations
+    WHEN OLD.status != 'Canceled' OR NEW.status != 'Canceled'
+    BEGIN
+        UPDATE Modules SET registered_count = registered_count - 1
+        WHERE id = OLD.module_id AND OLD.status != 'Canceled';
+        UPDATE Modules SET registered_count = registered_count + 1
+        WHERE id = NEW.module_id AND NEW.status != 'Canceled';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_reg_count_delete
+    AFTER DELETE ON ProjectRegistrations
+    WHEN OLD.status != 'Canceled'
+    BEGIN
+        UPDATE Modules SET registered_count = registered_count - 1 WHERE id = OLD.module_id;
+    END
+    """,
+]
+
+# Rollup bulanan per (bulan, modul, program, status), dijaga trigger pada setiap
+# insert, perubahan dan delete registrasi. Program diambil dari Scholars saat itu.
+ROLLUP_PROGRAM_OF_NEW = "COALESCE((SELECT program FROM Scholars WHERE id = NEW.scholar_id_fk), '')"
+ROLLUP_PROGRAM_OF_OLD = "COALESCE((SELECT program FROM Scholars WHERE id = OLD.scholar_id_fk), '')"
+ROLLUP_ADD_NEW = f"""
+        INSERT INTO RegistrationRollups (month, module_id, program, status, registrations, total_fee)
+        VALUES (substr(NEW.reg_date, 1, 7), COALESCE(NEW.module_id, 0), {ROLLUP_PROGRAM_OF_NEW}, NEW.status, 1, NEW.total_fee)
+        ON CONFLICT (month, module_id, program, status) DO UPDATE SET
+            registrations = registrations + 1,
+            total_fee = total_fee + excluded.total_fee;
+"""
+ROLLUP_REMOVE_OLD = f"""
+        UPDATE RegistrationRollups SET registrations = registrations - 1, total_fee = total_fee - OLD.total_fee
+        WHERE month = substr(OLD.reg_date, 1, 7) AND module_id = COALESCE(OLD.module_id, 0)
+          AND program = {ROLLUP_PROGRAM_OF_OLD} AND status = OLD.status;
+"""
+ROLLUP_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_insert
+    AFTER INSERT ON ProjectRegistrations
+    BEGIN {ROLLUP_ADD_NEW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+    AFTER UPDATE OF status, module_id, scholar_id_fk, reg_date, total_fee ON ProjectRegistrations
+    BEGIN {ROLLUP_REMOVE_OLD} {ROLLUP_ADD_NEW}
+    END
+    """,
+    # Registrasi yang dipindah ke arsip tetap dihitung di rollup (riwayat)
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_rollup_delete
+    AFTER DELETE ON ProjectRegistrations
+    WHEN NOT EXISTS (SELECT 1 FROM RegistrationArchive WHERE id = OLD.id)
+    BEGIN {ROLLUP_REMOVE_OLD}
+    END
+    """,
+]
+
+# Indeks teks penuh (FTS5, external content) untuk pencarian akademisi dan modul.
+# Trigger menyalin setiap perubahan kolom yang diindeks; perubahan registered_count
+# pada Modules tidak menyentuh indeks karena trigger hanya memantau kolom teks.
+SEARCH_INDEXES = {
+    'Scholars': ('ScholarSearch', ('scholar_id', 'name', 'contact_email', 'program')),
+    'Modules': ('ModuleSearch', ('module_code', 'title')),
+}
+SEARCH_RANK = {
+    'ScholarSearch': "bm25(10.0, 5.0, 2.0, 1.0)",  # NIM dan nama lebih berbobot
+    'ModuleSearch': "bm25(10.0, 5.0)",
+}
+
+def _search_index_sql(table, index, columns):
+    """Statement CREATE untuk satu indeks FTS5 beserta trigger sinkronisasinya."""
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{col}" for col in columns)
+    old_values = ", ".join(f"OLD.{col}" for col in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+            {cols}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{index.lower()}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index} (rowid, {cols}) VALUES (NEW.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{index.lower()}_update AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {index} ({index}, rowid, {cols}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO {index} (rowid, {cols}) VALUES (NEW.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{index.lower()}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {index} ({index}, rowid, {cols}) VALUES ('delete', OLD.id, {old_values});
+        END
+        """,
+    ]
+
+# --- Kueri yang dipakai tampilan (diperiksa oleh check_query_plans) ---
+# Katalog memuat modul penuh juga: pendaftar baru masuk daftar tunggu
+MODULE_CATALOG_COLUMNS = (
+    "M.id, M.module_code, M.title, M.credits, M.max_slots, M.status, M.registered_count, "
+    "(SELECT COUNT(*) FROM Waitlist W WHERE W.module_id = M.id) AS waitlist_count"
+)
+QUERY_AVAILABLE_MODULES = f"""
+    SELECT {MODULE_CATALOG_COLUMNS}
+    FROM Modules M
+    WHERE M.status = 'Open'
+    ORDER BY M.title
+    """
+QUERY_MODULE_TITLE = "SELECT title FROM Modules WHERE id = ?"
+QUERY_SCHOLAR_BY_NIM = "SELECT id FROM Scholars WHERE scholar_id = ?"
+QUERY_ACTIVE_REGISTRATION = "SELECT id FROM ProjectRegistrations WHERE module_id = ? AND scholar_id_fk = ? AND status != 'Canceled'"
+QUERY_WAITLIST_HEAD = "SELECT id, scholar_id_fk FROM Waitlist WHERE module_id = ? ORDER BY id LIMIT ?"
+QUERY_WAITLIST_POSITION = """
+    SELECT COUNT(*) FROM Waitlist
+    WHERE module_id = ?1 AND id <= (SELECT id FROM Waitlist WHERE module_id = ?1 AND scholar_id_fk = ?2)
+    """
+QUERY_TOTAL_REGISTERED = "SELECT COUNT(*) FROM ProjectRegistrations WHERE status = 'Registered'"
+QUERY_OPEN_CAPACITY = "SELECT SUM(max_slots), SUM(registered_count) FROM Modules WHERE status = 'Open'"
+QUERY_MONTHLY_FEE = "SELECT SUM(total_fee) FROM RegistrationRollups WHERE month = ? AND status = 'Registered'"
+# CROSS JOIN menjaga P di luar S: ORDER BY reg_date ... LIMIT tetap berhenti lebih
+# awal dengan filter program (idx_scholars_program dipakai oleh hitungan saja)
+QUERY_REGISTRATION_LIST = """
+    SELECT 
+        P.id, S.scholar_id, S.name AS scholar_name, M.module_code, M.title AS module_title, 
+        P.reg_date, P.total_fee, P.status, P.final_score, P.module_id, S.program
+    FROM ProjectRegistrations P
+    CROSS JOIN Scholars S ON P.scholar_id_fk = S.id
+    JOIN Modules M ON P.module_id = M.id
+    """
+QUERY_REGISTRATION_ORDER = " ORDER BY P.reg_date DESC, P.id DESC"
+QUERY_REGISTRATION_COUNT = "SELECT COUNT(*) FROM ProjectRegistrations P"
+# Pencarian FTS5 (lihat search_subquery/search_modules/search_scholars)
+SEARCH_MATCH_SUBQUERY = "SELECT rowid FROM {index} WHERE {index} MATCH ?"
+QUERY_MODULE_SEARCH = (
+    f"SELECT {MODULE_CATALOG_COLUMNS} "
+    "FROM ModuleSearch JOIN Modules M ON M.id = ModuleSearch.rowid "
+    "WHERE ModuleSearch MATCH ?{where} ORDER BY ModuleSearch.rank LIMIT ?"
+)
+QUERY_SCHOLAR_SEARCH = (
+    "SELECT S.id, S.scholar_id, S.name, S.contact_email, S.program "
+    "FROM ScholarSearch JOIN Scholars S ON S.id = ScholarSearch.rowid "
+    "WHERE ScholarSearch MATCH ? ORDER BY ScholarSearch.rank LIMIT ?"
+)
+REGISTRATION_SEARCH_FILTER = (
+    f" WHERE (P.scholar_id_fk IN ({SEARCH_MATCH_SUBQUERY.format(index='ScholarSearch')})"
+    f" OR P.module_id IN ({SEARCH_MATCH_SUBQUERY.format(index='ModuleSearch')}))"
+)
+# Registrasi aktif + arsip dengan kolom yang sama, dipakai sebagai "{source} P"
+REGISTRATION_FIELDS = "id, module_id, scholar_id_fk, reg_date, total_fee, status, final_score"
+REGISTRATION_HISTORY = f"""(
+        SELECT {REGISTRATION_FIELDS} FROM ProjectRegistrations
+        UNION ALL
+        SELECT {REGISTRATION_FIELDS} FROM RegistrationArchive
+    )"""
+# Status registrasi untuk API (aktif + arsip) dan antrean seorang akademisi
+QUERY_REGISTRATION_STATUS = f"""
+    SELECT P.id, P.status, P.final_score, P.reg_date, P.total_fee, M.module_code, M.title, S.scholar_id
+    FROM {REGISTRATION_HISTORY} P
+    JOIN Scholars S ON P.scholar_id_fk = S.id
+    LEFT JOIN Modules M ON P.module_id = M.id
+    """
+QUERY_REGISTRATION_BY_ID = QUERY_REGISTRATION_STATUS + " WHERE P.id = ?"
+QUERY_SCHOLAR_REGISTRATIONS = QUERY_REGISTRATION_STATUS + " WHERE S.scholar_id = ? ORDER BY P.reg_date DESC, P.id DESC"
+QUERY_SCHOLAR_WAITLIST = """
+    SELECT M.module_code, M.title, W.joined_at,
+        (SELECT COUNT(*) FROM Waitlist Q WHERE Q.module_id = W.module_id AND Q.id <= W.id) AS position
+    FROM Waitlist W
+    JOIN Scholars S ON W.scholar_id_fk = S.id
+    JOIN Modules M ON W.module_id = M.id
+    WHERE S.scholar_id = ?
+    ORDER BY W.id
+    """
+
+# Nama kueri -> (SQL, contoh parameter untuk EXPLAIN QUERY PLAN)
+KNOWN_QUERIES = {
+    'available_modules': (QUERY_AVAILABLE_MODULES, ()),
+    'module_title': (QUERY_MODULE_TITLE, (1,)),
+    'scholar_by_nim': (QUERY_SCHOLAR_BY_NIM, ('NIM001',)),
+    'active_registration': (QUERY_ACTIVE_REGISTRATION, (1, 1)),
+    'waitlist_head': (QUERY_WAITLIST_HEAD, (1, 5)),
+    'waitlist_position': (QUERY_WAITLIST_POSITION, (1, 1)),
+    'total_registered': (QUERY_TOTAL_REGISTERED, ()),
+    'open_capacity': (QUERY_OPEN_CAPACITY, ()),
+    'monthly_fee': (QUERY_MONTHLY_FEE, ('2024-01',)),
+    'monthly_trend': (
+        "SELECT R.month, R.status, SUM(R.registrations), SUM(R.total_fee) FROM RegistrationRollups R "
+        "WHERE R.month >= ? GROUP BY R.month, R.status", ('2024-01',)
+    ),
+    'registration_page': (
+        QUERY_REGISTRATION_LIST + QUERY_REGISTRATION_ORDER + " LIMIT ?", (REGISTRATION_PAGE_SIZE,)
+    ),
+    'registration_page_seek': (
+        QUERY_REGISTRATION_LIST + " WHERE (P.reg_date, P.id) < (?, ?)" + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+        ('2024-01-01 00:00:00', 1, REGISTRATION_PAGE_SIZE),
+    ),
+    'registration_page_status': (
+        QUERY_REGISTRATION_LIST + " WHERE P.status = ? AND (P.reg_date, P.id) < (?, ?)" + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+        ('Registered', '2024-01-01 00:00:00', 1, REGISTRATION_PAGE_SIZE),
+    ),
+    'registration_page_module': (
+        QUERY_REGISTRATION_LIST + " WHERE P.module_id = ? AND (P.reg_date, P.id) < (?, ?)" + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+        (1, '2024-01-01 00:00:00', 1, REGISTRATION_PAGE_SIZE),
+    ),
+    'registration_page_program': (
+        QUERY_REGISTRATION_LIST + " WHERE S.program = ?" + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+        ('Informatika', REGISTRATION_PAGE_SIZE),
+    ),
+    'registration_page_search': (
+        QUERY_REGISTRATION_LIST + REGISTRATION_SEARCH_FILTER + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+        ('"budi"*', '"budi"*', REGISTRATION_PAGE_SIZE),
+    ),
+    'registration_count': (QUERY_REGISTRATION_COUNT, ()),
+    'registration_count_status': (QUERY_REGISTRATION_COUNT + " WHERE P.status = ?", ('Registered',)),
+    'registration_count_module': (QUERY_REGISTRATION_COUNT + " WHERE P.module_id = ?", (1,)),
+    'registration_count_program': (
+        QUERY_REGISTRATION_COUNT + " JOIN Scholars S ON P.scholar_id_fk = S.id WHERE S.program = ?", ('Informatika',)
+    ),
+    'registration_count_search': (QUERY_REGISTRATION_COUNT + REGISTRATION_SEARCH_FILTER, ('"budi"*', '"budi"*')),
+    'module_search': (QUERY_MODULE_SEARCH.format(where=" AND M.status = 'Open'"), ('"data"*', SEARCH_LIMIT)),
+    'scholar_search': (QUERY_SCHOLAR_SEARCH, ('"budi"*', SEARCH_LIMIT)),
+    'registration_status': (QUERY_REGISTRATION_BY_ID, (1,)),
+    'scholar_registrations': (QUERY_SCHOLAR_REGISTRATIONS, ('NIM001',)),
+    'scholar_waitlist': (QUERY_SCHOLAR_WAITLIST, ('NIM001',)),
+}
+
+# Kueri tanpa LIMIT yang memang boleh membaca seluruh indeks secara berurutan
+# (tambahkan nama dari KNOWN_QUERIES beserta alasannya)
+INDEX_SCAN_ALLOWED = frozenset({
+    'registration_count',  # Total tanpa filter memang menghitung semua baris (lewat indeks penutup terkecil)
+})
 
+# --- Migrasi skema ---
+# Setiap migrasi berjalan sekali dalam transaksinya sendiri dan dicatat di
+# PRAGMA user_version. Migrasi harus idempoten karena database lama (sebelum
+# ada user_version) bisa saja sudah memiliki sebagian skemanya.
+
+def _migration_base_schema(cursor):
+    """v1: tabel utama dan data awal modul."""
     # --- 1. Modules (Modul/Mata Pelajaran) ---
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS Modules (
@@ -47,12 +1049,7 @@ def init_db():
         )
     ''')
 
-    conn.commit()
-    conn.close()
-    
     # Mengisi data awal
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM Modules")
     if cursor.fetchone()[0] == 0:
         initial_modules = [
@@ -62,100 +1059,998 @@ def init_db():
             ('PRJ400', 'Seminar Proposal Studi', 2, 40, 'Open'),
         ]
         cursor.executemany("INSERT INTO Modules (module_code, title, credits, max_slots, status) VALUES (?, ?, ?, ?, ?)", initial_modules)
-        conn.commit()
-    conn.close()
 
-def execute_query(query, params=(), fetch_all=False):
-    """Fungsi pembantu untuk menjalankan kueri."""
-    conn = sqlite3.connect(DATABASE_NAME)
+def _migration_registration_indexes(cursor):
+    """v2: indeks untuk kueri yang sering dipakai."""
+    for index_sql in SCHEMA_INDEXES:
+        cursor.execute(index_sql)
+
+def _migration_slot_counters(cursor):
+    """v3: kolom Modules.registered_count beserta trigger penjaganya."""
+    module_columns = [row[1] for row in cursor.execute("PRAGMA table_info(Modules)")]
+    if 'registered_count' not in module_columns:
+        cursor.execute("ALTER TABLE Modules ADD COLUMN registered_count INTEGER NOT NULL DEFAULT 0")
+    for trigger_sql in SCHEMA_TRIGGERS:
+        cursor.execute(trigger_sql)
+    cursor.execute(REBUILD_SLOT_COUNTERS)
+
+def _migration_rollups(cursor):
+    """v4: tabel rollup bulanan, trigger penjaganya dan backfill dari data yang ada."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS RegistrationRollups (
+            month TEXT NOT NULL,
+            module_id INTEGER NOT NULL,
+            program TEXT NOT NULL,
+            status TEXT NOT NULL,
+            registrations INTEGER NOT NULL DEFAULT 0,
+            total_fee REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, module_id, program, status)
+        ) WITHOUT ROWID
+    ''')
+    for trigger_sql in ROLLUP_TRIGGERS:
+        cursor.execute(trigger_sql)
+    cursor.execute("DELETE FROM RegistrationRollups")
+    cursor.execute(REBUILD_ROLLUPS.format(source="ProjectRegistrations"))
+
+def _migration_search_index(cursor):
+    """v5: indeks FTS5 untuk Scholars dan Modules (dilewati bila SQLite tanpa FTS5)."""
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError:
+        return  # Pencarian memakai LIKE
+    for table, (index, columns) in SEARCH_INDEXES.items():
+        for statement in _search_index_sql(table, index, columns):
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {index} ({index}, rank) VALUES ('rank', ?)", (SEARCH_RANK[index],))
+
+def _migration_cascade_and_archive(cursor):
+    """v6: ON DELETE CASCADE dari Modules ke registrasi, id tanpa daur ulang, dan tabel arsip.
+
+    ProjectRegistrations dibangun ulang (SQLite tidak bisa mengubah foreign key di
+    tempat); indeks dan trigger ikut terhapus bersama tabel lama sehingga dibuat lagi.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS RegistrationArchive (
+            id INTEGER PRIMARY KEY,
+            module_id INTEGER,
+            scholar_id_fk INTEGER,
+            reg_date TEXT NOT NULL,
+            total_fee REAL NOT NULL,
+            status TEXT NOT NULL,
+            final_score TEXT,
+            archived_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_date ON RegistrationArchive (reg_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_scholar ON RegistrationArchive (scholar_id_fk)")
+
+    # AUTOINCREMENT: id registrasi yang sudah diarsipkan tidak pernah dipakai ulang
+    cursor.execute('''
+        CREATE TABLE ProjectRegistrations_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            module_id INTEGER,
+            scholar_id_fk INTEGER,
+            reg_date TEXT NOT NULL,
+            total_fee REAL NOT NULL,
+            status TEXT NOT NULL CHECK(status IN ('Registered', 'InProgress', 'Completed', 'Canceled')),
+            final_score TEXT,
+            FOREIGN KEY (module_id) REFERENCES Modules(id) ON DELETE CASCADE,
+            FOREIGN KEY (scholar_id_fk) REFERENCES Scholars(id)
+        )
+    ''')
+    # Registrasi yang modul atau akademisinya sudah tidak ada adalah sisa hapus lama
+    # (cascade juga akan membuangnya); setelah ini PRAGMA foreign_key_check harus bersih
+    cursor.execute(f'''
+        INSERT INTO ProjectRegistrations_new ({REGISTRATION_FIELDS})
+        SELECT {REGISTRATION_FIELDS} FROM ProjectRegistrations
+        WHERE (module_id IS NULL OR module_id IN (SELECT id FROM Modules))
+          AND (scholar_id_fk IS NULL OR scholar_id_fk IN (SELECT id FROM Scholars))
+    ''')
+    cursor.execute("DROP TABLE ProjectRegistrations")
+    cursor.execute("ALTER TABLE ProjectRegistrations_new RENAME TO ProjectRegistrations")
+    for statement in SCHEMA_INDEXES + SCHEMA_TRIGGERS + ROLLUP_TRIGGERS:
+        cursor.execute(statement)
+    cursor.execute(REBUILD_SLOT_COUNTERS)
+    cursor.execute("DELETE FROM RegistrationRollups")
+    cursor.execute(REBUILD_ROLLUPS.format(source=REGISTRATION_HISTORY))
+
+def _migration_waitlist(cursor):
+    """v7: daftar tunggu per modul (FIFO menurut id)."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Waitlist (
+            id INTEGER PRIMARY KEY,
+            module_id INTEGER NOT NULL,
+            scholar_id_fk INTEGER NOT NULL,
+            joined_at TEXT NOT NULL,
+            UNIQUE (module_id, scholar_id_fk),
+            FOREIGN KEY (module_id) REFERENCES Modules(id) ON DELETE CASCADE,
+            FOREIGN KEY (scholar_id_fk) REFERENCES Scholars(id)
+        )
+    ''')
+    # Kepala antrean per modul dibaca lewat indeks ini tanpa sort
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_waitlist_module ON Waitlist (module_id, id)")
+
+def _migration_seat_counter(cursor):
+    """v8: registered_count menghitung semua registrasi bukan 'Canceled' (kursi terisi)."""
+    for trigger in ('trg_reg_count_insert', 'trg_reg_count_update', 'trg_reg_count_delete'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    for trigger_sql in SCHEMA_TRIGGERS:
+        cursor.execute(trigger_sql)
+    cursor.execute(REBUILD_SLOT_COUNTERS)
+
+def _migration_lookup_indexes(cursor):
+    """v9: indeks untuk filter program (daftar & jumlah registrasi) dan antrean per akademisi (API)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scholars_program ON Scholars (program)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_waitlist_scholar ON Waitlist (scholar_id_fk)")
+
+# Urutan tidak boleh diubah; tambahkan migrasi baru di akhir daftar
+MIGRATIONS = [
+    (1, _migration_base_schema),
+    (2, _migration_registration_indexes),
+    (3, _migration_slot_counters),
+    (4, _migration_rollups),
+    (5, _migration_search_index),
+    (6, _migration_cascade_and_archive),
+    (7, _migration_waitlist),
+    (8, _migration_seat_counter),
+    (9, _migration_lookup_indexes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+# Database lama bisa menyimpan registrasi yatim; v6 membersihkannya, jadi
+# PRAGMA foreign_key_check baru dijalankan mulai versi ini
+FOREIGN_KEY_CHECK_FROM = 6
+
+_schema_lock = threading.Lock()
+_schema_ready_for = None  # DATABASE_NAME yang skemanya sudah dipastikan terbaru
+
+def schema_version():
+    """Versi skema yang tercatat di database (PRAGMA user_version)."""
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+def migrate():
+    """Menjalankan migrasi yang belum diterapkan; mengembalikan daftar versi yang dijalankan."""
+    applied = []
+    conn = get_connection()
+    # Pembangunan ulang tabel butuh foreign key mati; PRAGMA ini hanya berlaku di luar transaksi
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for version, migration in MIGRATIONS:
+            if schema_version() >= version:
+                continue
+            with write_transaction() as conn:
+                # Cek ulang di dalam kunci tulis: proses lain mungkin baru saja bermigrasi
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    continue
+                migration(conn.cursor())
+                violations = conn.execute("PRAGMA foreign_key_check").fetchall() if version >= FOREIGN_KEY_CHECK_FROM else []
+                if violations:
+                    raise RuntimeError(f"Migrasi v{version} melanggar foreign key: {violations[:5]}")
+                conn.execute(f"PRAGMA user_version = {version}")
+            applied.append(version)
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+    return applied
+
+def init_db(force=False):
+    """Menyiapkan skema database sekali per proses (Streamlit memanggilnya di setiap rerun)."""
+    global _schema_ready_for
+    if MEMORY_DATABASE_ENABLED and not is_memory_database():
+        _ensure_memory_database()
+    if _schema_ready_for == DATABASE_NAME and not force:
+        return
+    with _schema_lock:
+        if _schema_ready_for == DATABASE_NAME and not force:
+            return
+        migrate()
+        _search_ready.pop(DATABASE_NAME, None)
+        # Indeks yang hilang langsung terlihat di log aplikasi, bukan hanya lewat CLI
+        try:
+            check_query_plans()
+        except RuntimeError as e:
+            logging.getLogger('sikampus.query_plan').warning("%s", e)
+        _schema_ready_for = DATABASE_NAME
+
+def execute_query(query, params=(), fetch_all=False, snapshot=False):
+    """Fungsi pembantu untuk menjalankan kueri (snapshot=True: SELECT dari snapshot baca)."""
+    conn = get_read_connection() if snapshot else get_connection()
     cursor = conn.cursor()
-    cursor.execute(query, params)
+    started = time.perf_counter()
     if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
-        conn.commit()
+        try:
+            cursor.execute(query, params)
+            _report_query(conn, query, params, time.perf_counter() - started, cursor.rowcount)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            _bump_write_generation()
         if query.strip().upper().startswith('INSERT'):
             return cursor.lastrowid
         return True
     
+    cursor.execute(query, params)
     result = cursor.fetchall()
-    conn.close()
+    _report_query(conn, query, params, time.perf_counter() - started, len(result))
     return result if fetch_all else (result[0] if result else None)
-    # main_sikampus.py
-import streamlit as st
-from db_sikampus import init_db
-from public_project_view import show_public_registration
-from academic_dashboard import show_academic_dashboard
 
-# ======================================
-# Inisialisasi Database
-# ======================================
-init_db()
+REBUILD_SLOT_COUNTERS = """
+    UPDATE Modules SET registered_count = (
+        SELECT COUNT(*) FROM ProjectRegistrations P
+        WHERE P.module_id = Modules.id AND P.status != 'Canceled'
+    )
+    """
 
-# ======================================
-# Konfigurasi Halaman
-# ======================================
-st.set_page_config(
-    page_title="SIKAMPUS - Sistem Informasi Kapsul Mahasiswa",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+def rebuild_slot_counters():
+    """Menghitung ulang registered_count semua modul dari tabel ProjectRegistrations."""
+    conn = get_connection()
+    try:
+        conn.execute(REBUILD_SLOT_COUNTERS)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _bump_write_generation()
 
-# ======================================
-# CSS TEMA PUTIH & UNGU
-# ======================================
-st.markdown("""
-<style>
-/* ===============================
-   TEMA PUTIH & UNGU (PURPLE)
-   =============================== */
+def verify_slot_counters():
+    """Membandingkan penghitung slot dengan data mentah.
 
-/* Background utama */
-.stApp {
-    background-color: #f7f5fb;
-}
+    Mengembalikan daftar (module_id, module_code, registered_count, jumlah_sebenarnya)
+    untuk modul yang tidak cocok; daftar kosong berarti semua penghitung akurat.
+    """
+    return execute_query("""
+        SELECT M.id, M.module_code, M.registered_count, COUNT(P.id) AS actual_count
+        FROM Modules M
+        LEFT JOIN ProjectRegistrations P ON M.id = P.module_id AND P.status != 'Canceled'
+        GROUP BY M.id
+        HAVING M.registered_count != COUNT(P.id)
+    """, fetch_all=True)
 
-/* Sidebar */
-.css-1d391kg, .e1fqkh3o7 {
-    background: linear-gradient(180deg, #6a0dad, #4b0082);
-    color: white;
+# --- Rollup bulanan (fee & registrasi) ---
+# {source}: ProjectRegistrations atau REGISTRATION_HISTORY (aktif + arsip)
+ROLLUP_FROM_REGISTRATIONS = """
+    SELECT substr(P.reg_date, 1, 7), COALESCE(P.module_id, 0), COALESCE(S.program, ''), P.status,
+           COUNT(*), SUM(P.total_fee)
+    FROM {source} P
+    LEFT JOIN Scholars S ON S.id = P.scholar_id_fk
+    GROUP BY 1, 2, 3, 4
+    """
+REBUILD_ROLLUPS = (
+    "INSERT INTO RegistrationRollups (month, module_id, program, status, registrations, total_fee)"
+    + ROLLUP_FROM_REGISTRATIONS
+)
+ROLLUP_DIMENSIONS = {
+    'status': "R.status",
+    'module': "M.module_code",
+    'program': "R.program",
 }
 
-/* Teks sidebar */
-.css-1d391kg .stRadio label,
-.css-1d391kg .stMarkdown,
-.css-1d391kg span {
-    color: white !important;
-}
+def rebuild_rollups():
+    """Membangun ulang RegistrationRollups dari ProjectRegistrations (backfill)."""
+    with write_transaction() as conn:
+        conn.execute("DELETE FROM RegistrationRollups")
+        conn.execute(REBUILD_ROLLUPS.format(source=REGISTRATION_HISTORY))
 
-/* Judul */
-h1, h2, h3, h4 {
-    color: #6a0dad;
-    font-weight: 700;
-}
+def verify_rollups():
+    """Baris rollup yang berbeda dari agregasi data mentah (kosong berarti akurat)."""
+    return execute_query(f"""
+        WITH raw (month, module_id, program, status, registrations, total_fee) AS (
+            {ROLLUP_FROM_REGISTRATIONS.format(source=REGISTRATION_HISTORY)}
+        ),
+        expected AS (
+            SELECT month, module_id, program, status, registrations, ROUND(total_fee, 2) FROM raw
+        ),
+        actual AS (
+            SELECT month, module_id, program, status, registrations, ROUND(total_fee, 2)
+            FROM RegistrationRollups WHERE registrations != 0
+        )
+        SELECT 'hilang', * FROM (SELECT * FROM expected EXCEPT SELECT * FROM actual)
+        UNION ALL
+        SELECT 'lebih', * FROM (SELECT * FROM actual EXCEPT SELECT * FROM expected)
+    """, fetch_all=True)
 
-/* Card / Container */
-.stCard,
-div[data-testid="stContainer"] {
-    background-color: white;
-    border-radius: 14px;
-    padding: 24px;
-    box-shadow: 0 8px 20px rgba(106, 13, 173, 0.12);
-    border: 1px solid #eee;
-}
+def _first_month(months):
+    """Bulan (YYYY-MM) `months - 1` bulan sebelum bulan ini."""
+    today = date.today()
+    month_index = today.year * 12 + today.month - 1 - (months - 1)
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
 
-/* Button */
-.stButton > button {
-    background: linear-gradient(135deg, #6a0dad, #9b5de5);
-    color: white !important;
-    border-radius: 10px;
-    border: none;
-    padding: 10px 22px;
-    font-weight: 600;
-    transition: all 0.3s ease;
-}
+def rollup_trend_query(dimension='status', months=12, status=None):
+    """Kueri tren bulanan dari rollup beserta parameternya (tanpa cache).
 
-.stButton > button:hover {
-    background: linear-gradient(135deg, #5a0cae, #7b2cbf);
-    transform: translateY(-2px);
+    dimension: 'status', 'module' atau 'program'.
+    """
+    key = ROLLUP_DIMENSIONS[dimension]
+    join = " JOIN Modules M ON M.id = R.module_id" if dimension == 'module' else ""
+    clauses, params = ["R.month >= ?"], [_first_month(months)]
+    if status:
+        clauses.append("R.status = ?")
+        params.append(status)
+    query = (
+        f"SELECT R.month, {key}, SUM(R.registrations), SUM(R.total_fee) "
+        f"FROM RegistrationRollups R{join} WHERE {' AND '.join(clauses)} "
+        f"GROUP BY R.month, {key} HAVING SUM(R.registrations) > 0 ORDER BY R.month"
+    )
+    return query, params
+
+def fetch_rollup_trend(dimension='status', months=12, status=None, snapshot=False):
+    """Tren bulanan dari rollup: baris (bulan, kelompok, jumlah registrasi, total fee)."""
+    query, params = rollup_trend_query(dimension, months, status)
+    return cached_query(query, params, fetch_all=True, snapshot=snapshot)
+
+# --- Pencarian teks (FTS5, cadangan LIKE) ---
+_SEARCH_WORD_PATTERN = re.compile(r"\w+")
+_search_ready = {}  # DATABASE_NAME -> indeks FTS5 tersedia
+
+def search_available():
+    """True jika database aktif punya indeks FTS5 (selain itu pencarian memakai LIKE)."""
+    ready = _search_ready.get(DATABASE_NAME)
+    if ready is None:
+        ready = execute_query(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('ScholarSearch', 'ModuleSearch')"
+        )[0] == len(SEARCH_INDEXES)
+        _search_ready[DATABASE_NAME] = ready
+    return ready
+
+def fts_query(text):
+    """Mengubah teks bebas menjadi ekspresi MATCH: setiap kata dicocokkan sebagai awalan."""
+    words = _SEARCH_WORD_PATTERN.findall(text or "")
+    return " ".join(f'"{word}"*' for word in words) or None
+
+def search_subquery(table, text):
+    """Subkueri 'SELECT id' untuk baris `table` yang cocok dengan teks, beserta parameternya."""
+    index, columns = SEARCH_INDEXES[table]
+    if search_available():
+        return SEARCH_MATCH_SUBQUERY.format(index=index), [fts_query(text)]
+    pattern = f"%{text.strip()}%"
+    return (
+        f"SELECT id FROM {table} WHERE " + " OR ".join(f"{col} LIKE ?" for col in columns),
+        [pattern] * len(columns),
+    )
+
+def search_modules(text, open_only=True, limit=SEARCH_LIMIT):
+    """Modul yang cocok dengan teks, paling relevan dulu (bentuk baris = QUERY_AVAILABLE_MODULES)."""
+    if fts_query(text) is None:
+        return []
+    where = " AND M.status = 'Open'" if open_only else ""
+    if search_available():
+        return cached_query(QUERY_MODULE_SEARCH.format(where=where), (fts_query(text), limit), fetch_all=True)
+    subquery, params = search_subquery('Modules', text)
+    query = (
+        f"SELECT {MODULE_CATALOG_COLUMNS} "
+        f"FROM Modules M WHERE M.id IN ({subquery}){where} ORDER BY M.title LIMIT ?"
+    )
+    return cached_query(query, params + [limit], fetch_all=True)
+
+def search_scholars(text, limit=SEARCH_LIMIT, snapshot=False):
+    """Akademisi yang cocok dengan teks: baris (id, scholar_id, name, contact_email, program)."""
+    if fts_query(text) is None:
+        return []
+    if search_available():
+        return cached_query(QUERY_SCHOLAR_SEARCH, (fts_query(text), limit), fetch_all=True, snapshot=snapshot)
+    subquery, params = search_subquery('Scholars', text)
+    query = (
+        "SELECT S.id, S.scholar_id, S.name, S.contact_email, S.program "
+        f"FROM Scholars S WHERE S.id IN ({subquery}) ORDER BY S.name LIMIT ?"
+    )
+    return cached_query(query, params + [limit], fetch_all=True, snapshot=snapshot)
+
+# --- Daftar registrasi dengan keyset pagination ---
+def registration_filters(status=None, module_id=None, program=None, date_from=None, date_to=None, search=None):
+    """Membangun klausa WHERE (daftar) dan parameter untuk filter registrasi.
+
+    date_from/date_to berformat 'YYYY-MM-DD' dan keduanya inklusif. `search` mencocokkan
+    teks dengan akademisi (NIM, nama, email, program) atau modul (kode, judul).
+    """
+    clauses, params = [], []
+    if fts_query(search):
+        scholar_sql, scholar_params = search_subquery('Scholars', search)
+        module_sql, module_params = search_subquery('Modules', search)
+        clauses.append(f"(P.scholar_id_fk IN ({scholar_sql}) OR P.module_id IN ({module_sql}))")
+        params.extend(scholar_params + module_params)
+    if status:
+        clauses.append("P.status = ?")
+        params.append(status)
+    if module_id:
+        clauses.append("P.module_id = ?")
+        params.append(module_id)
+    if program:
+        clauses.append("S.program = ?")
+        params.append(program)
+    if date_from:
+        clauses.append("P.reg_date >= ?")
+        params.append(str(date_from))
+    if date_to:
+        clauses.append("P.reg_date < date(?, '+1 day')")
+        params.append(str(date_to))
+    return clauses, params
+
+def fetch_registrations_page(after=None, page_size=REGISTRATION_PAGE_SIZE, snapshot=False, **filters):
+    """Mengambil satu halaman registrasi (terbaru dulu) dengan seek pada (reg_date, id).
+
+    `after` adalah kursor (reg_date, id) dari halaman sebelumnya, None untuk halaman
+    pertama. Mengembalikan (baris, kursor_berikutnya); kursor None berarti halaman terakhir.
+    """
+    clauses, params = registration_filters(**filters)
+    if after:
+        clauses.append("(P.reg_date, P.id) < (?, ?)")
+        params.extend(after)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+
+    # Ambil satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+    rows = cached_query(
+        QUERY_REGISTRATION_LIST + where + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+        params + [page_size + 1], fetch_all=True, snapshot=snapshot
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1][5], rows[-1][0])
+    return rows, next_cursor
+
+def count_registrations(snapshot=False, **filters):
+    """Jumlah total registrasi yang cocok dengan filter (untuk info paginasi)."""
+    clauses, params = registration_filters(**filters)
+    join = " JOIN Scholars S ON P.scholar_id_fk = S.id" if filters.get('program') else ""
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    result = cached_query(QUERY_REGISTRATION_COUNT + join + where, params, snapshot=snapshot)
+    return result[0] if result else 0
+
+# --- Hapus modul & arsip registrasi ---
+ARCHIVE_STATUSES = ('Completed', 'Canceled')  # Registrasi yang sudah selesai
+ARCHIVE_BATCH_SIZE = 10000  # Baris per transaksi saat mengarsipkan
+
+def delete_module(module_id):
+    """Menghapus modul beserta registrasinya (ON DELETE CASCADE) dalam satu transaksi."""
+    with write_transaction() as conn:
+        return conn.execute("DELETE FROM Modules WHERE id = ?", (module_id,)).rowcount > 0
+
+def semester_start(day=None):
+    """Tanggal awal semester yang memuat `day`: 1 Februari (genap) atau 1 Agustus (ganjil)."""
+    day = day or date.today()
+    if day.month >= 8:
+        return date(day.year, 8, 1)
+    if day.month >= 2:
+        return date(day.year, 2, 1)
+    return date(day.year - 1, 8, 1)
+
+def _archive_where(before):
+    placeholders = ", ".join("?" * len(ARCHIVE_STATUSES))
+    return f"status IN ({placeholders}) AND reg_date < ?", [*ARCHIVE_STATUSES, str(before or semester_start())]
+
+def count_archivable(before=None, snapshot=False):
+    """Jumlah registrasi selesai (Completed/Canceled) sebelum `before` (bawaan: awal semester ini)."""
+    where, params = _archive_where(before)
+    result = cached_query(f"SELECT COUNT(*) FROM ProjectRegistrations WHERE {where}", params, snapshot=snapshot)
+    return result[0] if result else 0
+
+def archive_registrations(before=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """Memindahkan registrasi selesai dari semester lalu ke RegistrationArchive.
+
+    Setiap batch disalin lalu dihapus dalam satu transaksi. Kursi registrasi
+    'Completed' yang diarsipkan ikut dilepas ke daftar tunggu, dan rollup tetap
+    memuat baris arsip. Mengembalikan jumlah registrasi yang diarsipkan.
+    """
+    where, params = _archive_where(before)
+    archived_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    moved = 0
+    while True:
+        with write_transaction() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.archive_batch")
+            batch = conn.execute(
+                f"INSERT INTO temp.archive_batch SELECT id FROM ProjectRegistrations WHERE {where} LIMIT ?",
+                params + [batch_size]
+            ).rowcount
+            if batch:
+                conn.execute(
+                    f"INSERT INTO RegistrationArchive ({REGISTRATION_FIELDS}, archived_at) "
+                    f"SELECT {REGISTRATION_FIELDS}, ? FROM ProjectRegistrations "
+                    f"WHERE id IN (SELECT id FROM temp.archive_batch)",
+                    (archived_at,)
+                )
+                released = dict(conn.execute(
+                    "SELECT module_id, COUNT(*) FROM ProjectRegistrations "
+                    "WHERE id IN (SELECT id FROM temp.archive_batch) AND status != 'Canceled' GROUP BY module_id"
+                ).fetchall())
+                conn.execute("DELETE FROM ProjectRegistrations WHERE id IN (SELECT id FROM temp.archive_batch)")
+                release_seats(conn, released)
+        moved += batch
+        if batch < batch_size:
+            return moved
+
+# --- Hasil register_scholar ---
+REG_REGISTERED = 'registered'
+REG_DUPLICATE = 'duplicate'
+REG_CLOSED = 'closed'
+REG_WAITLISTED = 'waitlisted'
+
+QUERY_INSERT_SCHOLAR = """
+    INSERT INTO Scholars (scholar_id, name, contact_email, program) VALUES (?, ?, ?, ?)
+    ON CONFLICT(scholar_id) DO NOTHING
+    """
+QUERY_INSERT_REGISTRATION = "INSERT INTO ProjectRegistrations (module_id, scholar_id_fk, reg_date, total_fee, status, final_score) VALUES (?, ?, ?, ?, ?, ?)"
+
+def join_waitlist(conn, module_id, scholar_fk):
+    """Memasukkan akademisi ke ujung antrean (sekali saja) di dalam transaksi pemanggil; mengembalikan posisinya."""
+    conn.execute(
+        "INSERT INTO Waitlist (module_id, scholar_id_fk, joined_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(module_id, scholar_id_fk) DO NOTHING",
+        (module_id, scholar_fk, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    )
+    return conn.execute(QUERY_WAITLIST_POSITION, (module_id, scholar_fk)).fetchone()[0]
+
+def _promote_waitlist(conn, module_id, seats):
+    """Mengisi sampai `seats` kursi modul dari kepala daftar tunggu, di dalam transaksi pemanggil.
+
+    Tidak pernah melebihi max_slots - registered_count. Hanya kepala antrean yang
+    dibaca (indeks (module_id, id)), jadi biayanya sebanding dengan jumlah yang
+    dipromosikan. Antrean yang terbentuk saat modul dibuka tetap dilayani walaupun
+    modul kemudian ditutup. Mengembalikan id registrasi baru.
+    """
+    promoted = []
+    reg_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    while True:
+        module = conn.execute(
+            "SELECT credits, max_slots - registered_count FROM Modules WHERE id = ?", (module_id,)
+        ).fetchone()
+        if module is None:
+            return promoted
+        credits, free_slots = module
+        limit = min(seats - len(promoted), free_slots)
+        if limit <= 0:
+            return promoted
+        head = conn.execute(QUERY_WAITLIST_HEAD, (module_id, limit)).fetchall()
+        if not head:
+            return promoted
+        for waitlist_id, scholar_fk in head:
+            conn.execute("DELETE FROM Waitlist WHERE id = ?", (waitlist_id,))
+            # Akademisi yang sudah aktif lewat jalur lain cukup dikeluarkan dari antrean
+            if conn.execute(QUERY_ACTIVE_REGISTRATION, (module_id, scholar_fk)).fetchone():
+                continue
+            cursor = conn.execute(
+                QUERY_INSERT_REGISTRATION,
+                (module_id, scholar_fk, reg_date, credits * PROJECT_COST_PER_CREDIT, 'Registered', None)
+            )
+            promoted.append(cursor.lastrowid)
+
+def release_seats(conn, released):
+    """Mengisi kursi yang dilepas dari daftar tunggu, di dalam transaksi pemanggil.
+
+    `released` memetakan module_id ke jumlah kursi yang dilepas: registrasi aktif
+    yang dibatalkan atau diarsipkan, atau max_slots yang bertambah. Status
+    'InProgress' dan 'Completed' tetap menempati kursinya (lihat SCHEMA_TRIGGERS).
+    Mengembalikan id registrasi hasil promosi.
+    """
+    return [
+        reg_id
+        for module_id, seats in released.items() if module_id is not None and seats > 0
+        for reg_id in _promote_waitlist(conn, module_id, seats)
+    ]
+
+def _seat_changes(conn, new_statuses):
+    """Kursi yang dilepas dan diambil per modul bila status baru diterapkan.
+
+    `new_statuses` memetakan reg_id ke status barunya. Registrasi aktif yang
+    dibatalkan melepas kursi; registrasi 'Canceled' yang diaktifkan kembali
+    mengambil kursi. Mengembalikan (released, taken) berupa Counter per module_id.
+    """
+    reg_ids = list(new_statuses)
+    released, taken = Counter(), Counter()
+    for start in range(0, len(reg_ids), IN_LIST_BATCH_SIZE):
+        batch = reg_ids[start:start + IN_LIST_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        for reg_id, module_id, status in conn.execute(
+            f"SELECT id, module_id, status FROM ProjectRegistrations WHERE id IN ({placeholders})", batch
+        ):
+            was_active, active = status != 'Canceled', new_statuses[reg_id] != 'Canceled'
+            if was_active and not active:
+                released[module_id] += 1
+            elif active and not was_active:
+                taken[module_id] += 1
+    return released, taken
+
+def _check_seats_taken(conn, taken):
+    """ValueError bila registrasi yang diaktifkan kembali membuat modulnya melebihi max_slots.
+
+    Dipanggil setelah UPDATE di transaksi yang sama, sehingga pengecualian ini
+    membatalkan seluruh perubahan.
+    """
+    for module_id, seats in taken.items():
+        if module_id is None or seats <= 0:
+            continue
+        module_code, max_slots, registered_count = conn.execute(
+            "SELECT module_code, max_slots, registered_count FROM Modules WHERE id = ?", (module_id,)
+        ).fetchone()
+        if registered_count > max_slots:
+            raise ValueError(
+                f"Slot modul {module_code} penuh: registrasi yang dibatalkan tidak dapat diaktifkan kembali."
+            )
+
+def _register_scholar(conn, module_id, scholar_id, name, email, program, reg_date=None):
+    """Langkah registrasi di dalam transaksi yang sudah dibuka oleh pemanggil."""
+    module = conn.execute(
+        "SELECT credits, max_slots, registered_count, status FROM Modules WHERE id = ?", (module_id,)
+    ).fetchone()
+    if module is None or module[3] != 'Open':
+        return REG_CLOSED, None
+    credits, max_slots, registered_count, _ = module
+
+    # 1. Tambahkan Akademisi jika belum ada
+    conn.execute(QUERY_INSERT_SCHOLAR, (scholar_id, name, email, program))
+    scholar_fk = conn.execute(QUERY_SCHOLAR_BY_NIM, (scholar_id,)).fetchone()[0]
+
+    # 2. Cek registrasi ganda
+    if conn.execute(QUERY_ACTIVE_REGISTRATION, (module_id, scholar_fk)).fetchone():
+        return REG_DUPLICATE, None
+
+    # 3. Cek kapasitas saat commit, bukan saat katalog ditampilkan; modul penuh atau
+    #    antrean belum kosong -> daftar tunggu (pendaftar baru tidak menyalip antrean)
+    if registered_count >= max_slots or conn.execute(QUERY_WAITLIST_HEAD, (module_id, 1)).fetchone():
+        return REG_WAITLISTED, join_waitlist(conn, module_id, scholar_fk)
+
+    reg_date = reg_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor = conn.execute(
+        QUERY_INSERT_REGISTRATION,
+        (module_id, scholar_fk, reg_date, credits * PROJECT_COST_PER_CREDIT, 'Registered', None)
+    )
+    return REG_REGISTERED, cursor.lastrowid
+
+def register_scholar(module_id, scholar_id, name, email, program, reg_date=None):
+    """Mendaftarkan akademisi ke modul dalam satu transaksi BEGIN IMMEDIATE.
+
+    Upsert akademisi, cek duplikat, cek kapasitas dan insert dilakukan dengan satu
+    commit. Mengembalikan (hasil, id_registrasi) dengan hasil salah satu dari
+    REG_REGISTERED, REG_DUPLICATE, REG_WAITLISTED atau REG_CLOSED. Untuk
+    REG_WAITLISTED nilai keduanya adalah posisi di daftar tunggu.
+    """
+    with write_transaction() as conn:
+        return _register_scholar(conn, module_id, scholar_id, name, email, program, reg_date)
+
+VALID_REGISTRATION_STATUSES = ('Registered', 'InProgress', 'Completed', 'Canceled')
+VALID_SCORES = ('A', 'B', 'C', 'D', 'E')
+
+# Hanya baris yang benar-benar berbeda yang ditulis (dan dihitung sebagai berubah)
+QUERY_BULK_UPDATE_STATUS = """
+    UPDATE ProjectRegistrations SET status = ?1, final_score = ?2
+    WHERE id = ?3 AND (status != ?1 OR final_score IS NOT ?2)
+    """
+
+def validate_status_update(new_status, final_score=None):
+    """Memeriksa pasangan status/nilai; ValueError bila tidak valid."""
+    if new_status not in VALID_REGISTRATION_STATUSES:
+        raise ValueError(f"Status tidak dikenal: {new_status}")
+    if final_score is not None and final_score not in VALID_SCORES:
+        raise ValueError(f"Nilai tidak dikenal: {final_score}")
+    if new_status == 'Completed' and not final_score:
+        raise ValueError("Status 'Completed' memerlukan Nilai Akhir.")
+
+def _update_registration_status(conn, reg_id, new_status, final_score=None):
+    """Mengubah status/nilai registrasi di dalam transaksi yang sudah dibuka.
+
+    Kursi registrasi aktif yang dibatalkan langsung diisi dari daftar tunggu;
+    registrasi 'Canceled' hanya bisa diaktifkan kembali bila modulnya masih punya slot.
+    """
+    validate_status_update(new_status, final_score)
+    released, taken = _seat_changes(conn, {reg_id: new_status})
+    cursor = conn.execute(
+        "UPDATE ProjectRegistrations SET status = ?, final_score = ? WHERE id = ?",
+        (new_status, final_score, reg_id)
+    )
+    _check_seats_taken(conn, taken)
+    release_seats(conn, released)
+    return cursor.rowcount > 0
+
+def update_registration_status(reg_id, new_status, final_score=None):
+    """Mengubah status dan nilai satu registrasi; True jika baris ditemukan."""
+    with write_transaction() as conn:
+        return _update_registration_status(conn, reg_id, new_status, final_score)
+
+def _bulk_update_registrations(conn, updates):
+    """Menjalankan (reg_id, status, nilai) yang sudah divalidasi dengan satu executemany."""
+    released, taken = _seat_changes(conn, {reg_id: new_status for reg_id, new_status, _ in updates})
+    cursor = conn.executemany(
+        QUERY_BULK_UPDATE_STATUS,
+        [(new_status, final_score, reg_id) for reg_id, new_status, final_score in updates]
+    )
+    _check_seats_taken(conn, taken)
+    release_seats(conn, released)
+    return cursor.rowcount
+
+def bulk_update_registrations(updates):
+    """Mengubah status/nilai banyak registrasi dalam satu transaksi.
+
+    `updates` berisi (reg_id, status, nilai). Setiap baris divalidasi lebih dulu; bila
+    ada yang tidak valid tidak ada yang disimpan dan ValueError menyebut ID-nya.
+    Mengembalikan jumlah baris yang berubah (baris yang sudah sama tidak dihitung).
+    """
+    updates = list(updates)
+    errors = []
+    for reg_id, new_status, final_score in updates:
+        try:
+            validate_status_update(new_status, final_score)
+        except ValueError as e:
+            errors.append(f"ID {reg_id}: {e}")
+    if errors:
+        raise ValueError(f"{len(errors)} baris tidak valid: " + "; ".join(errors[:5]))
+    if not updates:
+        return 0
+    with write_transaction() as conn:
+        return _bulk_update_registrations(conn, updates)
+
+def update_module_registrations(module_id, new_status, final_score=None, current_status=None):
+    """Mengubah status/nilai semua registrasi di satu modul dengan satu UPDATE.
+
+    Tanpa `current_status` hanya registrasi yang belum 'Canceled' yang diubah.
+    Mengaktifkan kembali registrasi 'Canceled' memerlukan slot kosong (ValueError
+    bila tidak cukup). Mengembalikan jumlah baris yang berubah.
+    """
+    validate_status_update(new_status, final_score)
+    status_clause = "status = ?" if current_status else "status != ?"
+    with write_transaction() as conn:
+        cursor = conn.execute(
+            f"UPDATE ProjectRegistrations SET status = ?, final_score = ? "
+            f"WHERE module_id = ? AND {status_clause} AND (status != ? OR final_score IS NOT ?)",
+            (new_status, final_score, module_id, current_status or 'Canceled', new_status, final_score)
+        )
+        # Setiap baris yang berubah menjadi 'Canceled' melepas satu kursi, dan
+        # setiap baris 'Canceled' yang diaktifkan kembali mengambil satu kursi
+        if new_status == 'Canceled' and current_status != 'Canceled':
+            release_seats(conn, {module_id: cursor.rowcount})
+        elif new_status != 'Canceled' and current_status == 'Canceled':
+            _check_seats_taken(conn, {module_id: cursor.rowcount})
+        return cursor.rowcount
+
+def update_module(module_id, module_code, title, credits, max_slots, status):
+    """Mengubah data modul; kursi tambahan (max_slots naik) diisi dari daftar tunggu.
+
+    Mengembalikan jumlah akademisi yang dipromosikan, atau None bila modul tidak ada.
+    """
+    with write_transaction() as conn:
+        previous = conn.execute("SELECT max_slots FROM Modules WHERE id = ?", (module_id,)).fetchone()
+        if previous is None:
+            return None
+        conn.execute(
+            "UPDATE Modules SET module_code=?, title=?, credits=?, max_slots=?, status=? WHERE id=?",
+            (module_code, title, credits, max_slots, status, module_id)
+        )
+        return len(release_seats(conn, {module_id: max_slots - previous[0]}))
+
+# --- Penulis group-commit ---
+class GroupCommitWriter:
+    """Thread penulis tunggal yang meng-commit permintaan tulis secara berkelompok.
+
+    Permintaan diambil dari antrean dan di-commit per batch (setiap batch_size item
+    atau setiap flush_interval_ms), sehingga lonjakan registrasi tidak berebut kunci
+    penulis SQLite. Setiap item memakai SAVEPOINT sendiri agar kegagalan satu
+    permintaan tidak membatalkan yang lain.
+    """
+
+    def __init__(self, batch_size=WRITE_QUEUE_BATCH_SIZE, flush_interval_ms=WRITE_QUEUE_FLUSH_MS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.batches_committed = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='sikampus-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, operation, *args):
+        """Memasukkan operation(conn, *args) ke antrean; hasilnya ditunggu lewat Future."""
+        future = Future()
+        self._queue.put((operation, args, future))
+        return future
+
+    def stop(self):
+        """Menghentikan thread setelah semua permintaan di antrean selesai di-commit."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+        close_connection()
+
+    def _commit_batch(self, batch):
+        results = []
+        try:
+            with write_transaction() as conn:
+                for operation, args, future in batch:
+                    conn.execute("SAVEPOINT write_item")
+                    try:
+                        results.append((future, operation(conn, *args), None))
+                        conn.execute("RELEASE write_item")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_item")
+                        conn.execute("RELEASE write_item")
+                        results.append((future, None, e))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches_committed += 1
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def start_write_queue(batch_size=WRITE_QUEUE_BATCH_SIZE, flush_interval_ms=WRITE_QUEUE_FLUSH_MS):
+    """Menyalakan penulis group-commit (sekali per proses)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = GroupCommitWriter(batch_size, flush_interval_ms)
+            atexit.register(stop_write_queue)
+        return _writer
+
+def stop_write_queue():
+    """Mematikan penulis group-commit; penulisan kembali langsung per permintaan."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+def _submit_write(operation, *args):
+    if _writer is None and WRITE_QUEUE_ENABLED:
+        start_write_queue()
+    if _writer is not None:
+        return _writer.submit(operation, *args)
+
+    # Tanpa antrean: jalankan langsung dalam transaksi sendiri
+    future = Future()
+    try:
+        with write_transaction() as conn:
+            future.set_result(operation(conn, *args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def submit_registration(module_id, scholar_id, name, email, program, reg_date=None):
+    """Versi register_scholar lewat antrean tulis; Future berisi (hasil, id_registrasi)."""
+    return _submit_write(_register_scholar, module_id, scholar_id, name, email, program, reg_date)
+
+def submit_status_update(reg_id, new_status, final_score=None):
+    """Versi update_registration_status lewat antrean tulis; Future berisi True/False."""
+    return _submit_write(_update_registration_status, reg_id, new_status, final_score)
+
+def explain_query(query, params=()):
+    """Mengembalikan baris detail dari EXPLAIN QUERY PLAN untuk sebuah kueri."""
+    rows = get_connection().execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+    return [row[3] for row in rows]
+
+_LIMIT_PATTERN = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+# Tabel virtual (FTS5) dengan batasan MATCH: idxStr tidak kosong, bukan pembacaan penuh
+_VIRTUAL_INDEX_PATTERN = re.compile(r"VIRTUAL TABLE INDEX \d+:\S+")
+
+def check_query_plans(queries=None):
+    """Memeriksa semua kueri yang dikenal; gagal jika ada yang jatuh ke SCAN.
+
+    SCAN menurut urutan indeks (untuk ORDER BY) hanya diperbolehkan bila kuerinya
+    punya LIMIT (pembacaan berhenti setelah N baris) atau namanya ada di
+    INDEX_SCAN_ALLOWED; selain itu SCAN ... USING INDEX tetap membaca seluruh indeks.
+    SCAN tabel FTS5 dengan MATCH adalah pencarian indeks. Kueri pencarian dilewati
+    bila database tidak punya indeks FTS5 (pencarian memakai LIKE).
+    """
+    queries = KNOWN_QUERIES if queries is None else queries
+    problems = {}
+    for name, (query, params) in queries.items():
+        if ' MATCH ' in query and not search_available():
+            continue
+        index_scan_ok = name in INDEX_SCAN_ALLOWED or _LIMIT_PATTERN.search(query) is not None
+        scans = [
+            detail for detail in explain_query(query, params)
+            if detail.startswith('SCAN') and not _VIRTUAL_INDEX_PATTERN.search(detail)
+            and not (index_scan_ok and 'USING' in detail and 'INDEX' in detail)
+        ]
+        if scans:
+            problems[name] = scans
+
+    if problems:
+        details = "; ".join(f"{name}: {', '.join(scans)}" for name, scans in problems.items())
+        raise RuntimeError(f"Kueri dengan SCAN terdeteksi: {details}")
+    return True
+    # main_sikampus.py
+import streamlit as st
+from db_sikampus import init_db, enable_query_stats, begin_render, query_view
+from public_project_view import show_public_registration
+from academic_dashboard import show_academic_dashboard
+
+# ======================================
+# Inisialisasi Database (migrasi hanya sekali per proses)
+# ======================================
+init_db()
+enable_query_stats()
+begin_render()
+
+# ======================================
+# Konfigurasi Halaman
+# ======================================
+st.set_page_config(
+    page_title="SIKAMPUS - Sistem Informasi Kapsul Mahasiswa",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# ======================================
+# CSS TEMA PUTIH & UNGU
+# ======================================
+st.markdown("""
+<style>
+/* ===============================
+   TEMA PUTIH & UNGU (PURPLE)
+   =============================== */
+
+/* Background utama */
+.stApp {
+    background-color: #f7f5fb;
+}
+
+/* Sidebar */
+.css-1d391kg, .e1fqkh3o7 {
+    background: linear-gradient(180deg, #6a0dad, #4b0082);
+    color: white;
+}
+
+/* Teks sidebar */
+.css-1d391kg .stRadio label,
+.css-1d391kg .stMarkdown,
+.css-1d391kg span {
+    color: white !important;
+}
+
+/* Judul */
+h1, h2, h3, h4 {
+    color: #6a0dad;
+    font-weight: 700;
+}
+
+/* Card / Container */
+.stCard,
+div[data-testid="stContainer"] {
+    background-color: white;
+    border-radius: 14px;
+    padding: 24px;
+    box-shadow: 0 8px 20px rgba(106, 13, 173, 0.12);
+    border: 1px solid #eee;
+}
+
+/* Button */
+.stButton > button {
+    background: linear-gradient(135deg, #6a0dad, #9b5de5);
+    color: white !important;
+    border-radius: 10px;
+    border: none;
+    padding: 10px 22px;
+    font-weight: 600;
+    transition: all 0.3s ease;
+}
+
+.stButton > button:hover {
+    background: linear-gradient(135deg, #5a0cae, #7b2cbf);
+    transform: translateY(-2px);
     box-shadow: 0 6px 15px rgba(106, 13, 173, 0.3);
 }
 
@@ -207,16 +2102,18 @@ role_choice = st.sidebar.radio(
 # ======================================
 if role_choice == 'Public (Registrasi Proyek)':
     st.session_state.user_role = 'Public'
-    show_public_registration()
+    with query_view('Registrasi Publik'):
+        show_public_registration()
 
 elif role_choice == 'Academic Staff (Dasbor)':
     st.session_state.user_role = 'Staff'
     show_academic_dashboard()
     # public_project_view.py
 import streamlit as st
-from db_sikampus import execute_query, DATABASE_NAME, PROJECT_COST_PER_CREDIT
-import sqlite3
-from datetime import datetime
+from db_sikampus import (
+    cached_query, submit_registration, search_modules, PROJECT_COST_PER_CREDIT, QUERY_AVAILABLE_MODULES,
+    QUERY_MODULE_TITLE, REG_REGISTERED, REG_DUPLICATE, REG_WAITLISTED,
+)
 
 def show_public_registration():
     """Menampilkan daftar modul proyek yang terbuka dan formulir registrasi."""
@@ -224,26 +2121,18 @@ def show_public_registration():
     st.markdown("Pilih modul proyek yang terbuka untuk studi lanjutan.")
     st.markdown("---")
 
-    # Ambil data modul yang "Open" dan hitung slot terisi
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    query = """
-    SELECT 
-        M.id, M.module_code, M.title, M.credits, M.max_slots, M.status,
-        COUNT(P.id) AS registered_count
-    FROM Modules M
-    LEFT JOIN ProjectRegistrations P ON M.id = P.module_id AND P.status = 'Registered'
-    WHERE M.status = 'Open'
-    GROUP BY M.id
-    HAVING M.max_slots > COUNT(P.id)
-    ORDER BY M.title
-    """
-    available_modules_data = cursor.execute(query).fetchall()
-    conn.close()
+    # Ambil data modul yang "Open" dan hitung slot terisi (atau hasil pencarian, paling relevan dulu)
+    search_text = st.text_input("🔎 Cari Modul", placeholder="Kode atau judul modul, misalnya: data")
+    if search_text.strip():
+        available_modules_data = search_modules(search_text)
+    else:
+        available_modules_data = cached_query(QUERY_AVAILABLE_MODULES, fetch_all=True)
 
     if not available_modules_data:
-        st.info("Saat ini tidak ada Modul Proyek yang terbuka atau memiliki slot tersedia.")
+        if search_text.strip():
+            st.info(f"Tidak ada modul terbuka yang cocok dengan '{search_text}'.")
+        else:
+            st.info("Saat ini tidak ada Modul Proyek yang terbuka.")
         return
 
     # --- Tampilan Daftar Modul ---
@@ -256,17 +2145,22 @@ def show_public_registration():
         st.session_state['show_reg_form'] = False
 
     for i, data in enumerate(available_modules_data):
-        module_id, code, title, credits, max_slots, status, registered_count = data
-        slots_available = max_slots - registered_count
+        module_id, code, title, credits, max_slots, status, registered_count, waitlist_count = data
+        # Selama antrean belum kosong, kursi yang tampak kosong tetap milik antrean
+        slots_available = 0 if waitlist_count else max(max_slots - registered_count, 0)
         
         with cols[i % 3]:
             with st.container(border=True): # Menggunakan border container sebagai Card
                 st.markdown(f"**{title} ({code})**", help=title)
                 st.caption(f"Credits: {credits} SKS")
                 st.markdown(f"Biaya Simulasi: **Rp {credits * PROJECT_COST_PER_CREDIT:,.0f}**")
-                st.markdown(f"Slot Tersisa: **{slots_available}** dari {max_slots}")
+                if slots_available:
+                    st.markdown(f"Slot Tersisa: **{slots_available}** dari {max_slots}")
+                else:
+                    st.markdown(f"Slot Penuh · **{waitlist_count}** orang di daftar tunggu")
 
-                if st.button("Daftar Proyek", key=f"reg_{module_id}", use_container_width=True):
+                button_label = "Daftar Proyek" if slots_available else "Masuk Daftar Tunggu"
+                if st.button(button_label, key=f"reg_{module_id}", use_container_width=True):
                     st.session_state['reg_module_id'] = module_id
                     st.session_state['reg_module_credits'] = credits
                     st.session_state['show_reg_form'] = True
@@ -278,7 +2172,7 @@ def show_public_registration():
         module_credits_to_reg = st.session_state['reg_module_credits']
         
         # Ambil nama modul yang dipilih
-        module_name = execute_query("SELECT title FROM Modules WHERE id = ?", (module_id_to_reg,))[0]
+        module_name = cached_query(QUERY_MODULE_TITLE, (module_id_to_reg,))[0]
 
         st.markdown("---")
         st.subheader(f"📝 Formulir Registrasi: {module_name}")
@@ -299,26 +2193,20 @@ def show_public_registration():
                 if scholar_id and name and email and program:
                     
                     try:
-                        # 1. Cek atau tambahkan Akademisi (Scholars)
-                        scholar_data = execute_query("SELECT id FROM Scholars WHERE scholar_id = ?", (scholar_id,))
-                        scholar_fk = None
-                        if scholar_data:
-                            scholar_fk = scholar_data[0]
-                        else:
-                            scholar_fk = execute_query("INSERT INTO Scholars (scholar_id, name, contact_email, program) VALUES (?, ?, ?, ?)", (scholar_id, name, email, program))
-
-                        # 2. Cek apakah Akademisi sudah terdaftar di proyek ini
-                        existing_reg = execute_query("SELECT id FROM ProjectRegistrations WHERE module_id = ? AND scholar_id_fk = ? AND status != 'Canceled'", (module_id_to_reg, scholar_fk))
-                        if existing_reg:
+                        # Upsert akademisi, cek duplikat, cek kapasitas dan insert dalam satu transaksi
+                        outcome, detail = submit_registration(module_id_to_reg, scholar_id, name, email, program).result()
+                        if outcome == REG_DUPLICATE:
                             st.warning("Anda sudah terdaftar di proyek ini.")
                             return
-                            
-                        # 3. Lakukan Registrasi Proyek
-                        reg_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        execute_query(
-                            "INSERT INTO ProjectRegistrations (module_id, scholar_id_fk, reg_date, total_fee, status, final_score) VALUES (?, ?, ?, ?, ?, ?)",
-                            (module_id_to_reg, scholar_fk, reg_date, total_fee, 'Registered', None)
-                        )
+                        if outcome == REG_WAITLISTED:
+                            st.info(
+                                f"⏳ Slot modul ini penuh. Anda berada di urutan **{detail}** daftar tunggu "
+                                "dan akan otomatis terdaftar saat ada kursi kosong."
+                            )
+                            return
+                        if outcome != REG_REGISTERED:
+                            st.warning("Modul ini sudah tidak dibuka untuk registrasi.")
+                            return
                         
                         st.success(f"✅ Registrasi Proyek berhasil! Status: **Registered**.")
                         
@@ -331,54 +2219,110 @@ def show_public_registration():
                     st.warning("Semua kolom wajib diisi.")
                     # academic_dashboard.py
 import streamlit as st
-from db_sikampus import execute_query, DATABASE_NAME, PROJECT_COST_PER_CREDIT
+from db_sikampus import (
+    execute_query, cached_query, submit_status_update, bulk_update_registrations, update_module_registrations,
+    fetch_registrations_page, count_registrations, search_scholars, update_module, delete_module, count_archivable,
+    archive_registrations, semester_start, query_view, render_query_summary, query_stats, read_cache_stats, fetch_rollup_trend, snapshot_status,
+    persistence_status,
+    PROJECT_COST_PER_CREDIT, QUERY_TOTAL_REGISTERED, QUERY_OPEN_CAPACITY, QUERY_MONTHLY_FEE,
+    REGISTRATION_PAGE_SIZE, VALID_REGISTRATION_STATUSES, VALID_SCORES,
+)
+from import_sikampus import import_scholars, import_registrations, import_grade_sheet
+from export_sikampus import export_registrations, EXPORT_FORMATS
+from frames_sikampus import frame_from_rows, MODULE_FRAME, REGISTRATION_FRAME
+import glob
+import os
 import pandas as pd
 import sqlite3
+import tempfile
+import time
 from datetime import datetime
 
+EXPORT_FILE_PREFIX = 'sikampus_export_'
+EXPORT_FILE_TTL_S = 24 * 3600  # File ekspor sesi yang sudah berakhir dihapus setelah selang ini
+
 def show_academic_dashboard():
     """Menampilkan navigasi dan konten dasbor Akademisi/Staf."""
     st.sidebar.markdown("---")
     dashboard_page = st.sidebar.radio(
         "Menu Akademik:", 
-        ['Ringkasan Proyek', 'Kelola Modul Proyek', 'Daftar Registrasi']
+        ['Ringkasan Proyek', 'Kelola Modul Proyek', 'Daftar Registrasi', 'Impor Data', 'Ekspor Data']
     )
 
-    if dashboard_page == 'Ringkasan Proyek':
-        show_metrics_summary()
-    elif dashboard_page == 'Kelola Modul Proyek':
-        manage_modules()
-    elif dashboard_page == 'Daftar Registrasi':
-        manage_registrations()
+    # Panel dibuat lebih dulu agar tampil di sidebar, lalu diisi setelah halaman selesai
+    perf_panel = st.sidebar.expander("⏱️ Performa Kueri")
+
+    with query_view(dashboard_page):
+        if dashboard_page == 'Ringkasan Proyek':
+            show_metrics_summary()
+        elif dashboard_page == 'Kelola Modul Proyek':
+            manage_modules()
+        elif dashboard_page == 'Daftar Registrasi':
+            manage_registrations()
+        elif dashboard_page == 'Impor Data':
+            import_data()
+        elif dashboard_page == 'Ekspor Data':
+            export_data()
+
+    with perf_panel:
+        show_query_performance()
+    show_snapshot_status()
+    show_persistence_status()
+
+# --- Status Snapshot Baca ---
+def show_snapshot_status():
+    """Menampilkan seberapa tertinggal data analitik bila dibaca dari snapshot."""
+    status = snapshot_status()
+    if not status['enabled']:
+        return
+    st.sidebar.caption(
+        f"🗂️ Ringkasan, daftar & ekspor dibaca dari snapshot: diperbarui {status['age_s']:.0f} detik lalu, "
+        f"tertinggal {status['writes_behind']} commit (maks. {status['max_age_s']} detik / "
+        f"{status['max_writes']} commit)."
+    )
+
+def show_persistence_status():
+    """Menampilkan kapan database memori terakhir disimpan ke disk (mode demo)."""
+    status = persistence_status()
+    if not status['enabled']:
+        return
+    saved = f"disimpan {status['age_s']:.0f} detik lalu" if status['age_s'] is not None else "belum disimpan"
+    st.sidebar.caption(f"💾 Database di RAM, {saved} ke {status['path']} ({status['save_ms']:.0f} ms).")
+
+# --- Panel Performa Kueri ---
+def show_query_performance():
+    summary = render_query_summary()
+    cache = read_cache_stats()
+    st.markdown(f"Render ini: **{summary['statements']}** statement, **{summary['total_ms']:.1f} ms**")
+    for view, (count, total_ms) in summary['by_view'].items():
+        st.caption(f"{view}: {count} statement, {total_ms:.1f} ms")
+    st.caption(f"Cache baca: {cache['hits']} hit / {cache['misses']} miss")
+
+    stats = query_stats()
+    if stats:
+        df_stats = pd.DataFrame(stats, columns=['shape', 'calls', 'p50_ms', 'p95_ms', 'p99_ms'])
+        df_stats.columns = ['Kueri', 'Panggilan', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)']
+        st.dataframe(df_stats, use_container_width=True, hide_index=True)
 
 # --- Fungsionalitas Metrik ---
 def show_metrics_summary():
     st.title("📊 Ringkasan Proyek SIKAMPUS")
     
     # 1. Total Akademisi Terdaftar (Registered)
-    total_registered = execute_query("SELECT COUNT(*) FROM ProjectRegistrations WHERE status = 'Registered'")
+    total_registered = cached_query(QUERY_TOTAL_REGISTERED, snapshot=True)
     total_registered_count = total_registered[0] if total_registered else 0
 
     # 2. Total Slot Proyek Tersedia
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    total_capacity_open_data = cursor.execute("SELECT SUM(max_slots) FROM Modules WHERE status = 'Open'").fetchone()
+    # Kapasitas dan slot terisi dibaca dari penghitung yang dijaga trigger
+    total_capacity_open_data = cached_query(QUERY_OPEN_CAPACITY, snapshot=True)
     total_capacity_open = total_capacity_open_data[0] if total_capacity_open_data and total_capacity_open_data[0] else 0
-    
-    total_occupied_data = cursor.execute("""
-        SELECT COUNT(P.id) 
-        FROM ProjectRegistrations P 
-        JOIN Modules M ON P.module_id = M.id 
-        WHERE P.status = 'Registered' AND M.status = 'Open'
-    """).fetchone()
-    total_occupied = total_occupied_data[0] if total_occupied_data and total_occupied_data[0] else 0
-    conn.close()
+    total_occupied = total_capacity_open_data[1] if total_capacity_open_data and total_capacity_open_data[1] else 0
     
     total_slots_available = total_capacity_open - total_occupied
 
-    # 3. Proyeksi Fee Bulan Ini
-    first_day_of_month = datetime.now().strftime('%Y-%m-01 00:00:00')
-    monthly_fee_data = execute_query("SELECT SUM(total_fee) FROM ProjectRegistrations WHERE status = 'Registered' AND reg_date >= ?", (first_day_of_month,))
+    # 3. Proyeksi Fee Bulan Ini (dari tabel rollup bulanan)
+    current_month = datetime.now().strftime('%Y-%m')
+    monthly_fee_data = cached_query(QUERY_MONTHLY_FEE, (current_month,), snapshot=True)
     monthly_fee_projection = monthly_fee_data[0] if monthly_fee_data and monthly_fee_data[0] else 0
     
     col1, col2, col3 = st.columns(3)
@@ -402,6 +2346,26 @@ def show_metrics_summary():
     
     st.markdown("---")
 
+    # 4. Tren Bulanan (rollup per bulan, modul, program, status)
+    st.subheader("📈 Tren Bulanan")
+    trend_dimensions = {'Status': 'status', 'Modul': 'module', 'Program Studi': 'program'}
+    col_t1, col_t2, col_t3, col_t4 = st.columns(4)
+    dimension_label = col_t1.selectbox("Kelompokkan per", list(trend_dimensions))
+    measure = col_t2.radio("Ukuran", ['Jumlah Registrasi', 'Total Fee'])
+    trend_status = col_t3.selectbox("Status", ['Semua'] + list(VALID_REGISTRATION_STATUSES), key="trend_status")
+    months = col_t4.slider("Jumlah Bulan", min_value=3, max_value=36, value=12)
+
+    trend_data = fetch_rollup_trend(
+        trend_dimensions[dimension_label], months, None if trend_status == 'Semua' else trend_status,
+        snapshot=True
+    )
+    if trend_data:
+        df_trend = pd.DataFrame(trend_data, columns=['Bulan', 'Kelompok', 'Jumlah Registrasi', 'Total Fee'])
+        chart_data = df_trend.pivot_table(index='Bulan', columns='Kelompok', values=measure, aggfunc='sum', fill_value=0)
+        st.line_chart(chart_data)
+    else:
+        st.info("Belum ada data registrasi pada periode ini.")
+
 
 # --- Fungsionalitas Kelola Modul (CRUD) ---
 def manage_modules():
@@ -413,7 +2377,7 @@ def manage_modules():
     module_id_to_edit = st.session_state.get('edit_module_id', None)
     initial_data = {}
     if module_id_to_edit:
-        data = execute_query("SELECT module_code, title, credits, max_slots, status FROM Modules WHERE id = ?", (module_id_to_edit,))
+        data = cached_query("SELECT module_code, title, credits, max_slots, status FROM Modules WHERE id = ?", (module_id_to_edit,))
         if data:
             initial_data = {'module_code': data[0], 'title': data[1], 'credits': data[2], 'max_slots': data[3], 'status': data[4]}
     
@@ -434,12 +2398,11 @@ def manage_modules():
             if code and title:
                 try:
                     if module_id_to_edit:
-                        # UPDATE
-                        execute_query(
-                            "UPDATE Modules SET module_code=?, title=?, credits=?, max_slots=?, status=? WHERE id=?",
-                            (code, title, credits, max_slots, status, module_id_to_edit)
-                        )
+                        # UPDATE (kursi baru langsung diisi dari daftar tunggu)
+                        promoted = update_module(module_id_to_edit, code, title, credits, max_slots, status)
                         st.success(f"✅ Modul ID {module_id_to_edit} berhasil diupdate!")
+                        if promoted:
+                            st.info(f"{promoted} akademisi dipindahkan dari daftar tunggu.")
                         del st.session_state['edit_module_id']
                     else:
                         # CREATE
@@ -461,9 +2424,15 @@ def manage_modules():
     # --- CRUD: READ (Tabel Data) ---
     st.subheader("Daftar Semua Modul Proyek")
     
-    modules_data = execute_query("SELECT id, module_code, title, credits, max_slots, status FROM Modules", fetch_all=True)
+    modules_data = cached_query(
+        "SELECT M.id, M.module_code, M.title, M.credits, M.max_slots, M.status, "
+        "(SELECT COUNT(*) FROM Waitlist W WHERE W.module_id = M.id) FROM Modules M",
+        fetch_all=True
+    )
     if modules_data:
-        df_modules = pd.DataFrame(modules_data, columns=['ID', 'Kode', 'Judul', 'Credits', 'Slot Max', 'Status'])
+        # Kolom bertipe (kategori, angka ringkas) agar sort/filter di tabel ringan
+        df_modules = frame_from_rows(modules_data, MODULE_FRAME)
+        df_modules.columns = ['ID', 'Kode', 'Judul', 'Credits', 'Slot Max', 'Status', 'Daftar Tunggu']
         st.dataframe(df_modules, use_container_width=True)
         
         # --- CRUD: DELETE / EDIT (Aksi) ---
@@ -476,8 +2445,7 @@ def manage_modules():
             
         if col_actions[2].button("Hapus Permanen", key="del_mod_btn", help="Hapus Modul dan semua registrasi terkait"):
             try:
-                execute_query("DELETE FROM ProjectRegistrations WHERE module_id = ?", (module_id_to_act,))
-                execute_query("DELETE FROM Modules WHERE id = ?", (module_id_to_act,))
+                delete_module(module_id_to_act)
                 st.success(f"🗑️ Modul ID {module_id_to_act} dan registrasi terkait berhasil dihapus.")
                 st.experimental_rerun()
             except Exception as e:
@@ -486,28 +2454,75 @@ def manage_modules():
         st.info("Tidak ada data Modul Proyek.")
 
 # --- Fungsionalitas Daftar Registrasi ---
+def registration_filter_widgets(key_prefix):
+    """Widget filter registrasi (status, modul, program, tanggal); filter dijalankan di database."""
+    modules = cached_query("SELECT id, module_code FROM Modules ORDER BY module_code", fetch_all=True)
+    module_labels = {module_id: code for module_id, code in modules}
+
+    search_text = st.text_input(
+        "🔎 Cari", placeholder="NIM, nama, email, program studi, kode atau judul modul", key=f"{key_prefix}_search"
+    )
+    col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+    status_filter = col_f1.selectbox("Status", ['Semua'] + list(VALID_REGISTRATION_STATUSES), key=f"{key_prefix}_status")
+    module_filter = col_f2.selectbox(
+        "Modul", [None] + list(module_labels), format_func=lambda m: 'Semua' if m is None else module_labels[m],
+        key=f"{key_prefix}_module"
+    )
+    program_filter = col_f3.text_input("Program Studi", key=f"{key_prefix}_program")
+    date_range = col_f4.date_input("Rentang Tanggal", value=(), key=f"{key_prefix}_dates")
+
+    return {
+        'status': None if status_filter == 'Semua' else status_filter,
+        'module_id': module_filter,
+        'program': program_filter.strip() or None,
+        'date_from': date_range[0] if len(date_range) > 0 else None,
+        'date_to': date_range[1] if len(date_range) > 1 else None,
+        'search': search_text.strip() or None,
+    }
+
 def manage_registrations():
     st.title("📋 Daftar Registrasi Proyek")
 
-    # --- READ (Tabel Registrasi Lengkap) ---
-    query = """
-    SELECT 
-        P.id, S.scholar_id, S.name AS scholar_name, M.module_code, M.title AS module_title, 
-        P.reg_date, P.total_fee, P.status, P.final_score, P.module_id
-    FROM ProjectRegistrations P
-    JOIN Scholars S ON P.scholar_id_fk = S.id
-    JOIN Modules M ON P.module_id = M.id
-    ORDER BY P.reg_date DESC
-    """
-    registrations_data = execute_query(query, fetch_all=True)
+    # --- Filter (dijalankan di database, bukan di pandas) ---
+    filters = registration_filter_widgets('reg')
+
+    # Kursor halaman disimpan di session; direset saat filter berubah
+    if st.session_state.get('reg_filters') != filters:
+        st.session_state['reg_filters'] = filters
+        st.session_state['reg_page_cursors'] = [None]
+    page_cursors = st.session_state['reg_page_cursors']
+
+    # Akademisi yang paling cocok dengan pencarian (peringkat FTS)
+    if filters['search']:
+        matched_scholars = search_scholars(filters['search'], snapshot=True)
+        with st.expander(f"Akademisi cocok ({len(matched_scholars)} teratas)"):
+            st.dataframe(
+                pd.DataFrame(matched_scholars, columns=['ID', 'NIM', 'Nama', 'Email', 'Program Studi']).drop(columns=['ID']),
+                use_container_width=True, hide_index=True
+            )
+
+    # --- READ (Satu Halaman Registrasi) ---
+    total_registrations = count_registrations(snapshot=True, **filters)
+    registrations_data, next_cursor = fetch_registrations_page(page_cursors[-1], snapshot=True, **filters)
     
     if registrations_data:
-        df_registrations = pd.DataFrame(registrations_data, columns=[
+        df_registrations = frame_from_rows(registrations_data, REGISTRATION_FRAME)
+        df_registrations.columns = [
             'ID Reg', 'ID Akademisi', 'Nama Akademisi', 'Kode Modul', 'Judul Modul', 
-            'Tgl Registrasi', 'Total Fee', 'Status', 'Nilai Akhir', 'Module ID (Internal)'
-        ])
+            'Tgl Registrasi', 'Total Fee', 'Status', 'Nilai Akhir', 'Module ID (Internal)', 'Program Studi'
+        ]
         
         st.dataframe(df_registrations.drop(columns=['Module ID (Internal)']), use_container_width=True)
+
+        total_pages = max(1, -(-total_registrations // REGISTRATION_PAGE_SIZE))
+        col_p1, col_p2, col_p3 = st.columns([1, 2, 1])
+        if col_p1.button("⬅️ Sebelumnya", disabled=len(page_cursors) == 1):
+            page_cursors.pop()
+            st.experimental_rerun()
+        col_p2.caption(f"Halaman {len(page_cursors)} dari {total_pages} — total {total_registrations} registrasi")
+        if col_p3.button("Berikutnya ➡️", disabled=next_cursor is None):
+            page_cursors.append(next_cursor)
+            st.experimental_rerun()
         
         st.markdown("---")
         st.subheader("Ubah Status & Berikan Nilai/Score")
@@ -529,13 +2544,1764 @@ def manage_registrations():
                     st.warning("Status 'Completed' memerlukan Nilai Akhir.")
                 else:
                     try:
-                        execute_query(
-                            "UPDATE ProjectRegistrations SET status = ?, final_score = ? WHERE id = ?",
-                            (new_status, updated_score, reg_id)
-                        )
+                        if not submit_status_update(reg_id, new_status, updated_score).result():
+                            st.warning(f"Registrasi ID {reg_id} tidak ditemukan.")
+                            return
                         st.success(f"✅ Registrasi ID {reg_id} berhasil diupdate ke Status: **{new_status}** dan Nilai: **{updated_score if updated_score else '-'}**.")
                         st.experimental_rerun()
                     except Exception as e:
                         st.error(f"Gagal mengupdate registrasi: {e}")
+
+        st.markdown("---")
+        bulk_update_registrations_form(df_registrations['ID Reg'].tolist())
+    else:
+        st.info("Tidak ada data Registrasi Proyek.")
+
+    archive_registrations_panel()
+
+def archive_registrations_panel():
+    """Memindahkan registrasi Completed/Canceled dari semester lalu ke tabel arsip."""
+    with st.expander("🗄️ Arsip Registrasi Semester Lalu"):
+        before = semester_start()
+        archivable = count_archivable(before, snapshot=True)
+        st.caption(
+            f"{archivable} registrasi Completed/Canceled sebelum {before:%d-%m-%Y} dapat diarsipkan. "
+            "Registrasi arsip tetap masuk rollup dan bisa diekspor."
+        )
+        if st.button("Arsipkan Sekarang", disabled=archivable == 0):
+            with st.spinner("Mengarsipkan registrasi..."):
+                moved = archive_registrations(before)
+            st.success(f"✅ {moved} registrasi dipindahkan ke arsip.")
+
+def bulk_update_registrations_form(page_reg_ids):
+    """Form ubah status/nilai massal: baris terpilih di halaman ini atau semua di satu modul."""
+    st.subheader("Ubah Massal Status & Nilai")
+    modules = cached_query("SELECT id, module_code FROM Modules ORDER BY module_code", fetch_all=True)
+    module_labels = {module_id: code for module_id, code in modules}
+
+    # Hasil disimpan di session agar tetap tampil setelah halaman dimuat ulang
+    if 'bulk_update_message' in st.session_state:
+        st.success(st.session_state.pop('bulk_update_message'))
+
+    with st.form("bulk_update_form"):
+        target = st.radio("Terapkan ke:", ['Baris terpilih', 'Semua registrasi aktif di modul'], horizontal=True)
+        selected_ids = st.multiselect("ID Registrasi (halaman ini):", page_reg_ids)
+        module_id = st.selectbox("Modul:", list(module_labels), format_func=lambda m: module_labels[m])
+        col_b1, col_b2 = st.columns(2)
+        new_status = col_b1.selectbox("Status Baru:", VALID_REGISTRATION_STATUSES, key="bulk_status")
+        final_score = col_b2.selectbox("Nilai Akhir (wajib untuk Completed):", list(VALID_SCORES) + ['N/A'], key="bulk_score")
+        updated_score = final_score if final_score != 'N/A' and new_status == 'Completed' else None
+
+        if st.form_submit_button("Terapkan Perubahan Massal"):
+            try:
+                if target == 'Baris terpilih':
+                    if not selected_ids:
+                        st.warning("Pilih minimal satu ID registrasi.")
+                        return
+                    changed = bulk_update_registrations((reg_id, new_status, updated_score) for reg_id in selected_ids)
+                else:
+                    changed = update_module_registrations(module_id, new_status, updated_score)
+                st.session_state['bulk_update_message'] = f"✅ {changed} registrasi berubah ke Status: **{new_status}**."
+                st.experimental_rerun()
+            except ValueError as e:
+                st.warning(str(e))
+            except Exception as e:
+                st.error(f"Gagal mengupdate registrasi: {e}")
+
+# --- Fungsionalitas Impor Data (CSV) ---
+def import_data():
+    st.title("📥 Impor Data dari CSV")
+    st.markdown(
+        "Akademisi: `scholar_id, name, contact_email, program`  \n"
+        "Registrasi: `scholar_id, module_code` (opsional `reg_date, status, final_score` "
+        "dan kolom akademisi untuk membuat akademisi baru)  \n"
+        "Lembar Nilai: `scholar_id, module_code, final_score` (opsional `status`, bawaan `Completed`)"
+    )
+
+    importers = {
+        'Akademisi': import_scholars,
+        'Registrasi Proyek': import_registrations,
+        'Lembar Nilai': import_grade_sheet,
+    }
+    import_kind = st.radio("Jenis Data:", list(importers), horizontal=True)
+    uploaded_file = st.file_uploader("File CSV", type=['csv'])
+
+    if uploaded_file is not None and st.button("Mulai Impor"):
+        importer = importers[import_kind]
+        try:
+            with st.spinner("Mengimpor data..."):
+                report = importer(uploaded_file)
+        except ValueError as e:
+            st.error(f"File tidak valid: {e}")
+            return
+
+        saved = f"{report['changed']} berubah" if 'changed' in report else f"{report['inserted']} disimpan"
+        if report.get('waitlisted'):
+            saved += f", {report['waitlisted']} masuk daftar tunggu"
+        st.success(f"✅ {report['rows']} baris dibaca, {saved}, {report['skipped']} dilewati.")
+        if report['error_count']:
+            st.warning(f"{report['error_count']} baris gagal divalidasi.")
+            st.dataframe(pd.DataFrame(report['errors'], columns=['Baris', 'Keterangan']), use_container_width=True)
+
+# --- Fungsionalitas Ekspor Data ---
+def _session_export_path():
+    """Satu file ekspor per sesi, dipakai ulang (ditimpa) pada setiap ekspor berikutnya.
+
+    Streamlit tidak memberi tahu saat sesi berakhir, jadi file sesi lain yang
+    lebih tua dari EXPORT_FILE_TTL_S dibersihkan ketika sesi baru membuat file.
+    """
+    export_path = st.session_state.get('export_path')
+    if export_path is None:
+        expired = time.time() - EXPORT_FILE_TTL_S
+        for stale_path in glob.glob(os.path.join(tempfile.gettempdir(), EXPORT_FILE_PREFIX + '*')):
+            try:
+                if os.path.getmtime(stale_path) < expired:
+                    os.remove(stale_path)
+            except OSError:
+                pass
+        handle, export_path = tempfile.mkstemp(prefix=EXPORT_FILE_PREFIX)
+        os.close(handle)
+        st.session_state['export_path'] = export_path
+    return export_path
+
+def export_data():
+    st.title("📤 Ekspor Registrasi Proyek")
+    st.markdown("Ekspor lengkap registrasi beserta data akademisi, modul dan fee.")
+
+    filters = registration_filter_widgets('export')
+    export_format = st.radio("Format:", EXPORT_FORMATS, horizontal=True)
+    include_archive = st.checkbox("Sertakan registrasi yang sudah diarsipkan")
+
+    if st.button("Siapkan File Ekspor"):
+        # Baris ditulis bertahap ke file sementara, bukan ditampung di memori
+        export_path = _session_export_path()
+        st.session_state.pop('export_file', None)
+        with st.spinner("Mengekspor data..."):
+            summary = export_registrations(
+                export_path, export_format, snapshot=True, include_archive=include_archive, **filters
+            )
+        st.session_state['export_file'] = (export_path, export_format, summary)
+
+    if 'export_file' in st.session_state:
+        export_path, export_format, summary = st.session_state['export_file']
+        st.success(f"✅ {summary['rows']} registrasi diekspor. Total Fee: **Rp {summary['total_fee']:,.0f}**")
+        if summary['fee_by_module']:
+            st.dataframe(
+                pd.DataFrame(sorted(summary['fee_by_module'].items()), columns=['Kode Modul', 'Total Fee']),
+                use_container_width=True
+            )
+        # Batasan: st.download_button membaca seluruh file ke memori server dan mengirimnya
+        # lewat websocket, jadi ukuran unduhan dibatasi RAM dan server.maxMessageSize.
+        # Ekspor yang sangat besar sebaiknya memakai CLI: `python cli_sikampus.py export`.
+        st.caption(f"Ukuran file: {os.path.getsize(export_path) / 1e6:,.1f} MB. "
+                   "Untuk ekspor sangat besar gunakan perintah CLI `export`.")
+        with open(export_path, 'rb') as export_file:
+            st.download_button(
+                "⬇️ Unduh File", export_file, file_name=f"registrasi_sikampus.{export_format}"
+            )
+
+# import_sikampus.py
+import csv
+import io
+from collections import Counter
+from datetime import datetime
+from db_sikampus import (
+    execute_query, write_transaction, validate_status_update, PROJECT_COST_PER_CREDIT,
+    VALID_REGISTRATION_STATUSES, VALID_SCORES, QUERY_INSERT_SCHOLAR, QUERY_INSERT_REGISTRATION,
+    QUERY_BULK_UPDATE_STATUS, release_seats, join_waitlist,
+)
+
+IMPORT_CHUNK_SIZE = 5000  # Baris per transaksi saat impor
+MAX_REPORTED_ERRORS = 1000  # Batas error per baris yang disimpan di laporan
+LOOKUP_BATCH_SIZE = 500  # Jumlah parameter per kueri IN (...)
+
+SCHOLAR_COLUMNS = ('scholar_id', 'name', 'contact_email', 'program')
+REGISTRATION_COLUMNS = ('scholar_id', 'module_code')
+GRADE_SHEET_COLUMNS = ('scholar_id', 'module_code', 'final_score')
+
+def _open_csv(source):
+    """Membuka path, file teks, atau file biner (upload Streamlit) sebagai aliran teks."""
+    if isinstance(source, str):
+        return open(source, newline='', encoding='utf-8-sig')
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+
+def _read_chunks(source, required_columns, chunk_size):
+    """Membaca CSV baris demi baris dan menghasilkan potongan [(nomor_baris, row), ...]."""
+    handle = _open_csv(source)
+    try:
+        reader = csv.DictReader(handle)
+        missing = [col for col in required_columns if col not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Kolom wajib tidak ada: {', '.join(missing)}")
+
+        chunk = []
+        for row in reader:
+            chunk.append((reader.line_num, {k: (v or '').strip() for k, v in row.items() if k}))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        if isinstance(source, str):
+            handle.close()
+
+def _new_report():
+    return {'rows': 0, 'inserted': 0, 'skipped': 0, 'error_count': 0, 'errors': []}
+
+def _add_error(report, line_no, message):
+    report['error_count'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append((line_no, message))
+
+def _validate_scholar(row):
+    missing = [col for col in SCHOLAR_COLUMNS if not row.get(col)]
+    if missing:
+        raise ValueError(f"Kolom kosong: {', '.join(missing)}")
+    if len(row['scholar_id']) > 10:
+        raise ValueError("scholar_id maksimal 10 karakter")
+    return tuple(row[col] for col in SCHOLAR_COLUMNS)
+
+def _parse_reg_date(value):
+    if not value:
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    raise ValueError(f"Format reg_date tidak dikenal: {value}")
+
+def _resolve_scholars(conn, nims):
+    """Memetakan scholar_id (NIM) ke Scholars.id secara massal."""
+    nims = list(nims)
+    resolved = {}
+    for start in range(0, len(nims), LOOKUP_BATCH_SIZE):
+        batch = nims[start:start + LOOKUP_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        resolved.update(conn.execute(
+            f"SELECT scholar_id, id FROM Scholars WHERE scholar_id IN ({placeholders})", batch
+        ).fetchall())
+    return resolved
+
+def _active_registration_ids(conn, scholar_fks):
+    """Memetakan (scholar_id_fk, module_id) ke id registrasi aktif (bukan 'Canceled')."""
+    scholar_fks = list(scholar_fks)
+    active = {}
+    for start in range(0, len(scholar_fks), LOOKUP_BATCH_SIZE):
+        batch = scholar_fks[start:start + LOOKUP_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        for scholar_fk, module_id, reg_id in conn.execute(
+            f"SELECT scholar_id_fk, module_id, id FROM ProjectRegistrations "
+            f"WHERE scholar_id_fk IN ({placeholders}) AND status != 'Canceled'", batch
+        ):
+            active[(scholar_fk, module_id)] = reg_id
+    return active
+
+def _active_registrations(conn, scholar_fks):
+    """Pasangan (scholar_id_fk, module_id) yang sudah punya registrasi aktif."""
+    return set(_active_registration_ids(conn, scholar_fks))
+
+def import_scholars(source, chunk_size=IMPORT_CHUNK_SIZE):
+    """Mengimpor akademisi dari CSV (scholar_id, name, contact_email, program).
+
+    File dibaca bertahap dan setiap potongan disimpan dengan executemany dalam satu
+    transaksi. Akademisi yang sudah ada dilewati; baris tidak valid dicatat di laporan.
+    """
+    report = _new_report()
+    for chunk in _read_chunks(source, SCHOLAR_COLUMNS, chunk_size):
+        valid = []
+        for line_no, row in chunk:
+            report['rows'] += 1
+            try:
+                valid.append(_validate_scholar(row))
+            except ValueError as e:
+                _add_error(report, line_no, str(e))
+
+        with write_transaction() as conn:
+            inserted = conn.executemany(QUERY_INSERT_SCHOLAR, valid).rowcount
+        report['inserted'] += inserted
+        report['skipped'] += len(valid) - inserted
+    return report
+
+def import_registrations(source, chunk_size=IMPORT_CHUNK_SIZE):
+    """Mengimpor registrasi proyek dari CSV.
+
+    Kolom wajib: scholar_id, module_code. Kolom opsional: reg_date, status, final_score,
+    serta name/contact_email/program untuk membuat akademisi yang belum ada. Validasi
+    sama dengan registrasi biasa: tidak boleh ganda, setiap registrasi bukan 'Canceled'
+    memakai satu slot, dan registrasi 'Registered' hanya untuk modul Open. Seperti
+    register_scholar, baris 'Registered' untuk modul yang penuh atau antreannya belum
+    kosong dimasukkan ke daftar tunggu (dihitung di `waitlisted`).
+    """
+    modules = {
+        code: (module_id, credits)
+        for module_id, code, credits in execute_query("SELECT id, module_code, credits FROM Modules", fetch_all=True)
+    }
+    report = _new_report()
+    report['waitlisted'] = 0
+
+    for chunk in _read_chunks(source, REGISTRATION_COLUMNS, chunk_size):
+        parsed = []
+        new_scholars = []
+        for line_no, row in chunk:
+            report['rows'] += 1
+            try:
+                if not row['scholar_id']:
+                    raise ValueError("scholar_id kosong")
+                if row['module_code'] not in modules:
+                    raise ValueError(f"Kode modul tidak dikenal: {row['module_code']}")
+                status = row.get('status') or 'Registered'
+                if status not in VALID_REGISTRATION_STATUSES:
+                    raise ValueError(f"Status tidak dikenal: {status}")
+                final_score = row.get('final_score') or None
+                if final_score is not None and final_score not in VALID_SCORES:
+                    raise ValueError(f"Nilai tidak dikenal: {final_score}")
+                if status == 'Completed' and final_score is None:
+                    raise ValueError("Status 'Completed' memerlukan final_score")
+                reg_date = _parse_reg_date(row.get('reg_date'))
+                if all(row.get(col) for col in SCHOLAR_COLUMNS):
+                    new_scholars.append(_validate_scholar(row))
+                parsed.append((line_no, row['scholar_id'], modules[row['module_code']], reg_date, status, final_score))
+            except ValueError as e:
+                _add_error(report, line_no, str(e))
+
+        with write_transaction() as conn:
+            if new_scholars:
+                conn.executemany(QUERY_INSERT_SCHOLAR, new_scholars)
+            scholar_ids = _resolve_scholars(conn, {item[1] for item in parsed})
+            active = _active_registrations(conn, set(scholar_ids.values()))
+            capacity = {
+                module_id: (status == 'Open', max_slots - registered_count)
+                for module_id, max_slots, registered_count, status in conn.execute(
+                    "SELECT id, max_slots, registered_count, status FROM Modules"
+                )
+            }
+            queued = {module_id for (module_id,) in conn.execute("SELECT DISTINCT module_id FROM Waitlist")}
+
+            rows_to_insert = []
+            for line_no, nim, (module_id, credits), reg_date, status, final_score in parsed:
+                scholar_fk = scholar_ids.get(nim)
+                if scholar_fk is None:
+                    _add_error(report, line_no, f"Akademisi tidak ditemukan: {nim}")
+                    continue
+                if status != 'Canceled':
+                    if (scholar_fk, module_id) in active:
+                        _add_error(report, line_no, f"{nim} sudah terdaftar di modul ini")
+                        continue
+                    active.add((scholar_fk, module_id))
+                if status != 'Canceled':
+                    is_open, slots_left = capacity[module_id]
+                    if status == 'Registered' and not is_open:
+                        _add_error(report, line_no, "Modul tidak dibuka")
+                        active.discard((scholar_fk, module_id))
+                        continue
+                    if status == 'Registered' and (slots_left <= 0 or module_id in queued):
+                        # Pendaftar impor tidak menyalip antrean; baris ganda berikutnya tetap ditolak
+                        join_waitlist(conn, module_id, scholar_fk)
+                        queued.add(module_id)
+                        report['waitlisted'] += 1
+                        continue
+                    if slots_left <= 0:
+                        _add_error(report, line_no, "Slot modul sudah penuh")
+                        active.discard((scholar_fk, module_id))
+                        continue
+                    capacity[module_id] = (is_open, slots_left - 1)
+                rows_to_insert.append(
+                    (module_id, scholar_fk, reg_date, credits * PROJECT_COST_PER_CREDIT, status, final_score)
+                )
+            conn.executemany(QUERY_INSERT_REGISTRATION, rows_to_insert)
+        report['inserted'] += len(rows_to_insert)
+
+    report['skipped'] = report['rows'] - report['inserted'] - report['waitlisted'] - report['error_count']
+    return report
+
+def import_grade_sheet(source, chunk_size=IMPORT_CHUNK_SIZE):
+    """Menerapkan lembar nilai dari CSV ke registrasi aktif dalam satu transaksi.
+
+    Kolom wajib: scholar_id, module_code, final_score. Kolom opsional: status
+    (bawaan 'Completed'). Baris yang tidak valid dilaporkan dan dilewati; `changed`
+    menghitung registrasi yang benar-benar berubah.
+    """
+    modules = dict(execute_query("SELECT module_code, id FROM Modules", fetch_all=True))
+    report = {'rows': 0, 'changed': 0, 'skipped': 0, 'error_count': 0, 'errors': []}
+
+    with write_transaction() as conn:
+        released = Counter()  # Kursi yang dilepas baris 'Canceled', per modul
+        for chunk in _read_chunks(source, GRADE_SHEET_COLUMNS, chunk_size):
+            parsed = []
+            for line_no, row in chunk:
+                report['rows'] += 1
+                try:
+                    if row['module_code'] not in modules:
+                        raise ValueError(f"Kode modul tidak dikenal: {row['module_code']}")
+                    status = row.get('status') or 'Completed'
+                    final_score = row['final_score'] or None
+                    validate_status_update(status, final_score)
+                    parsed.append((line_no, row['scholar_id'], modules[row['module_code']], status, final_score))
+                except ValueError as e:
+                    _add_error(report, line_no, str(e))
+
+            scholar_ids = _resolve_scholars(conn, {item[1] for item in parsed})
+            active = _active_registration_ids(conn, set(scholar_ids.values()))
+            updates = []
+            canceled = set()
+            for line_no, nim, module_id, status, final_score in parsed:
+                reg_id = active.get((scholar_ids.get(nim), module_id))
+                if reg_id is None:
+                    _add_error(report, line_no, f"{nim} tidak punya registrasi aktif di modul ini")
+                    continue
+                updates.append((status, final_score, reg_id))
+                if status == 'Canceled' and reg_id not in canceled:
+                    canceled.add(reg_id)
+                    released[module_id] += 1
+            report['changed'] += conn.executemany(QUERY_BULK_UPDATE_STATUS, updates).rowcount
+        # Registrasi aktif yang dibatalkan lewat lembar nilai langsung diisi dari daftar tunggu
+        release_seats(conn, released)
+
+    report['skipped'] = report['rows'] - report['changed'] - report['error_count']
+    return report
+
+# export_sikampus.py
+import csv
+from collections import defaultdict
+from db_sikampus import get_connection, get_read_connection, registration_filters, REGISTRATION_HISTORY
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Ekspor Parquet/Arrow bersifat opsional
+    pa = None
+    pq = None
+
+EXPORT_CHUNK_SIZE = 10000  # Baris per fetchmany / row group
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow') if pa is not None else ('csv',)
+
+EXPORT_COLUMNS = [
+    'reg_id', 'reg_date', 'status', 'final_score', 'total_fee',
+    'scholar_id', 'scholar_name', 'contact_email', 'program',
+    'module_code', 'module_title', 'credits',
+]
+QUERY_EXPORT = """
+    SELECT
+        P.id, P.reg_date, P.status, P.final_score, P.total_fee,
+        S.scholar_id, S.name, S.contact_email, S.program,
+        M.module_code, M.title, M.credits
+    FROM {source} P
+    JOIN Scholars S ON P.scholar_id_fk = S.id
+    JOIN Modules M ON P.module_id = M.id
+    """
+
+def iter_registration_chunks(chunk_size=EXPORT_CHUNK_SIZE, snapshot=False, include_archive=False, **filters):
+    """Menghasilkan baris ekspor per potongan dari satu cursor (tidak pernah fetchall)."""
+    clauses, params = registration_filters(**filters)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    source = REGISTRATION_HISTORY if include_archive else "ProjectRegistrations"
+    conn = get_read_connection() if snapshot else get_connection()
+    cursor = conn.execute(QUERY_EXPORT.format(source=source) + where + " ORDER BY P.reg_date, P.id", params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def _arrow_schema():
+    return pa.schema([
+        ('reg_id', pa.int64()), ('reg_date', pa.string()), ('status', pa.string()),
+        ('final_score', pa.string()), ('total_fee', pa.float64()),
+        ('scholar_id', pa.string()), ('scholar_name', pa.string()),
+        ('contact_email', pa.string()), ('program', pa.string()),
+        ('module_code', pa.string()), ('module_title', pa.string()), ('credits', pa.int64()),
+    ])
+
+def _arrow_batch(schema, rows):
+    columns = list(zip(*rows))
+    return pa.record_batch([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema)
+
+def export_registrations(destination, fmt='csv', chunk_size=EXPORT_CHUNK_SIZE, snapshot=False, include_archive=False, **filters):
+    """Mengekspor registrasi (join Scholars & Modules) ke CSV, Parquet atau Arrow.
+
+    `destination` berupa path atau file (teks untuk CSV, biner untuk Parquet/Arrow).
+    Baris ditulis per potongan sehingga memori tetap konstan. Filter sama dengan
+    daftar registrasi; snapshot=True membaca dari snapshot baca bila aktif dan
+    include_archive=True ikut mengekspor registrasi yang sudah diarsipkan.
+    Mengembalikan jumlah baris dan total fee (keseluruhan & per modul).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak didukung: {fmt} (pasang pyarrow untuk Parquet/Arrow)")
+
+    summary = {'rows': 0, 'total_fee': 0.0, 'fee_by_module': defaultdict(float)}
+
+    def track(rows):
+        summary['rows'] += len(rows)
+        for row in rows:
+            summary['total_fee'] += row[4]
+            summary['fee_by_module'][row[9]] += row[4]
+
+    chunks = iter_registration_chunks(chunk_size, snapshot, include_archive, **filters)
+    if fmt == 'csv':
+        handle = open(destination, 'w', newline='', encoding='utf-8') if isinstance(destination, str) else destination
+        try:
+            writer = csv.writer(handle)
+            writer.writerow(EXPORT_COLUMNS)
+            for rows in chunks:
+                writer.writerows(rows)
+                track(rows)
+        finally:
+            if isinstance(destination, str):
+                handle.close()
     else:
-        st.info("Tidak ada data Registrasi Proyek.")
\ No newline at end of file
+        schema = _arrow_schema()
+        writer = pq.ParquetWriter(destination, schema) if fmt == 'parquet' else pa.ipc.new_file(destination, schema)
+        try:
+            for rows in chunks:
+                batch = _arrow_batch(schema, rows)
+                if fmt == 'parquet':
+                    writer.write_table(pa.Table.from_batches([batch]))
+                else:
+                    writer.write_batch(batch)
+                track(rows)
+        finally:
+            writer.close()
+
+    summary['fee_by_module'] = dict(summary['fee_by_module'])
+    return summary
+
+# frames_sikampus.py
+import pandas as pd
+from pandas.api.types import union_categoricals
+from db_sikampus import (
+    get_connection, get_read_connection, VALID_REGISTRATION_STATUSES, VALID_SCORES,
+    QUERY_REGISTRATION_LIST, QUERY_REGISTRATION_ORDER,
+)
+
+try:
+    import pyarrow  # noqa: F401  (hanya untuk dtype string yang ringkas)
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = object
+
+FRAME_CHUNK_SIZE = 50_000  # Baris per fetchmany saat membangun DataFrame
+REG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Skema kolom: (nama, jenis). Jenis berupa dtype pandas, 'category' (kategori
+# terbuka), tuple kategori tetap, 'datetime', atau 'string'.
+MODULE_FRAME = [
+    ('id', 'Int64'), ('module_code', 'category'), ('title', 'string'),
+    ('credits', 'Int8'), ('max_slots', 'Int32'), ('status', ('Open', 'Closed')),
+    ('waitlist_count', 'Int32'),
+]
+REGISTRATION_FRAME = [
+    ('reg_id', 'Int64'), ('scholar_id', 'string'), ('scholar_name', 'string'),
+    ('module_code', 'category'), ('module_title', 'category'), ('reg_date', 'datetime'),
+    ('total_fee', 'float64'), ('status', VALID_REGISTRATION_STATUSES), ('final_score', VALID_SCORES),
+    ('module_id', 'Int64'), ('program', 'category'),
+]
+
+def _typed_column(values, kind):
+    """Mengubah satu kolom (tuple nilai Python) menjadi array pandas bertipe."""
+    if kind == 'category':
+        return pd.Categorical(values)
+    if isinstance(kind, tuple):
+        return pd.Categorical(values, categories=kind)
+    if kind == 'datetime':
+        return pd.to_datetime(pd.Series(values, dtype=object), format=REG_DATE_FORMAT, errors='coerce').array
+    if kind == 'string':
+        return pd.array(values, dtype=STRING_DTYPE)
+    return pd.array(values, dtype=kind)
+
+def frame_from_chunks(chunks, schema):
+    """Membangun DataFrame bertipe dari potongan baris (list tuple) tanpa DataFrame object sementara.
+
+    Setiap potongan langsung diubah per kolom ke dtype tujuan, sehingga tuple Python
+    hanya hidup selama satu potongan. Kategori digabung dengan union_categoricals.
+    """
+    parts = {name: [] for name, _ in schema}
+    for rows in chunks:
+        columns = list(zip(*rows)) if rows else [()] * len(schema)
+        for (name, kind), values in zip(schema, columns):
+            parts[name].append(_typed_column(values, kind))
+
+    data = {}
+    for name, kind in schema:
+        arrays = parts[name] or [_typed_column((), kind)]
+        if kind == 'category' or isinstance(kind, tuple):
+            data[name] = union_categoricals(arrays) if len(arrays) > 1 else arrays[0]
+        else:
+            data[name] = pd.concat([pd.Series(array) for array in arrays], ignore_index=True)
+    return pd.DataFrame(data)
+
+def frame_from_rows(rows, schema):
+    """Seperti frame_from_chunks untuk hasil kueri yang sudah ada di memori."""
+    return frame_from_chunks([rows], schema)
+
+def read_frame(query, params=(), schema=REGISTRATION_FRAME, chunk_size=FRAME_CHUNK_SIZE, snapshot=False):
+    """Menjalankan SELECT dan membaca hasilnya per fetchmany langsung ke DataFrame bertipe."""
+    conn = get_read_connection() if snapshot else get_connection()
+    cursor = conn.execute(query, params)
+
+    def chunks():
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    return frame_from_chunks(chunks(), schema)
+
+def read_registrations_frame(chunk_size=FRAME_CHUNK_SIZE, snapshot=False):
+    """Semua registrasi aktif (join akademisi & modul) sebagai DataFrame bertipe, terbaru dulu."""
+    return read_frame(QUERY_REGISTRATION_LIST + QUERY_REGISTRATION_ORDER, (), REGISTRATION_FRAME, chunk_size, snapshot)
+
+# api_sikampus.py
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote
+from db_sikampus import (
+    init_db, cached_query, submit_registration, search_modules, PROJECT_COST_PER_CREDIT,
+    QUERY_AVAILABLE_MODULES, QUERY_REGISTRATION_BY_ID, QUERY_SCHOLAR_REGISTRATIONS, QUERY_SCHOLAR_WAITLIST,
+    REG_REGISTERED, REG_WAITLISTED,
+)
+
+API_HOST = '127.0.0.1'
+API_PORT = 8502
+API_WORKERS = 16  # Thread pekerja; masing-masing memakai ulang koneksi SQLite-nya
+API_IDLE_TIMEOUT_S = 5  # Koneksi keep-alive yang diam ditutup agar pekerja tidak tertahan
+API_MAX_BODY_BYTES = 64 * 1024
+SQLITE_MAX_INTEGER = 2 ** 63 - 1  # id di luar int64 membuat sqlite3 melempar OverflowError
+
+api_log = logging.getLogger('sikampus.api')
+
+# Kolom QUERY_REGISTRATION_STATUS (db_sikampus)
+REGISTRATION_STATUS_FIELDS = (
+    'id', 'status', 'final_score', 'reg_date', 'total_fee', 'module_code', 'module_title', 'scholar_id',
+)
+MODULE_FIELDS = ('id', 'module_code', 'title', 'credits', 'max_slots', 'status', 'registered_count', 'waitlist_count')
+REGISTER_FIELDS = ('module_id', 'scholar_id', 'name', 'email', 'program')
+WAITLIST_FIELDS = ('module_code', 'module_title', 'joined_at', 'position')
+
+def _module_payload(row):
+    module = dict(zip(MODULE_FIELDS, row))
+    free_slots = max(module['max_slots'] - module['registered_count'], 0)
+    module['slots_available'] = 0 if module['waitlist_count'] else free_slots
+    module['fee'] = module['credits'] * PROJECT_COST_PER_CREDIT
+    return module
+
+def api_modules(params):
+    """GET /api/modules[?q=teks]: modul terbuka; yang penuh menerima daftar tunggu."""
+    text = (params.get('q') or [''])[0]
+    rows = search_modules(text) if text.strip() else cached_query(QUERY_AVAILABLE_MODULES, fetch_all=True)
+    return 200, {'modules': [_module_payload(row) for row in rows]}
+
+def api_register(body):
+    """POST /api/registrations: registrasi akademisi ke satu modul."""
+    missing = [field for field in REGISTER_FIELDS if not str(body.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f"Kolom wajib kosong: {', '.join(missing)}")
+    try:
+        module_id = int(body['module_id'])
+    except (TypeError, ValueError):
+        raise ValueError("module_id harus berupa angka")
+    if abs(module_id) > SQLITE_MAX_INTEGER:
+        raise ValueError("module_id di luar jangkauan")
+    scholar_id = str(body['scholar_id']).strip()
+    if len(scholar_id) > 10:
+        raise ValueError("scholar_id maksimal 10 karakter")
+
+    outcome, detail = submit_registration(
+        module_id, scholar_id, str(body['name']).strip(), str(body['email']).strip(), str(body['program']).strip()
+    ).result()
+    if outcome == REG_WAITLISTED:
+        return 202, {'outcome': outcome, 'waitlist_position': detail}
+    return (201 if outcome == REG_REGISTERED else 409), {'outcome': outcome, 'registration_id': detail}
+
+def api_registration_status(reg_id):
+    """GET /api/registrations/<id>: status satu registrasi (termasuk yang sudah diarsipkan)."""
+    row = None
+    if int(reg_id) <= SQLITE_MAX_INTEGER:
+        row = cached_query(QUERY_REGISTRATION_BY_ID, (int(reg_id),))
+    if row is None:
+        return 404, {'error': f"Registrasi {reg_id} tidak ditemukan"}
+    return 200, dict(zip(REGISTRATION_STATUS_FIELDS, row))
+
+def api_scholar_registrations(scholar_id):
+    """GET /api/scholars/<nim>/registrations: semua registrasi seorang akademisi (terbaru dulu) dan antreannya."""
+    rows = cached_query(QUERY_SCHOLAR_REGISTRATIONS, (scholar_id,), fetch_all=True)
+    waiting = cached_query(QUERY_SCHOLAR_WAITLIST, (scholar_id,), fetch_all=True)
+    return 200, {
+        'scholar_id': scholar_id,
+        'registrations': [dict(zip(REGISTRATION_STATUS_FIELDS, row)) for row in rows],
+        'waitlist': [dict(zip(WAITLIST_FIELDS, row)) for row in waiting],
+    }
+
+# (metode, pola path, fungsi); grup dari pola diteruskan sebagai argumen
+API_ROUTES = [
+    ('GET', re.compile(r"/api/health"), lambda handler: (200, {'status': 'ok'})),
+    ('GET', re.compile(r"/api/modules"), lambda handler: api_modules(handler.query_params)),
+    ('POST', re.compile(r"/api/registrations"), lambda handler: api_register(handler.read_json())),
+    ('GET', re.compile(r"/api/registrations/(\d+)"), lambda handler, reg_id: api_registration_status(reg_id)),
+    ('GET', re.compile(r"/api/scholars/([^/]+)/registrations"),
+     lambda handler, nim: api_scholar_registrations(unquote(nim))),
+]
+
+class SikampusAPIHandler(BaseHTTPRequestHandler):
+    """Handler JSON untuk API SIKAMPUS (HTTP/1.1 keep-alive)."""
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SikampusAPI/1.0'
+    timeout = API_IDLE_TIMEOUT_S
+    # Header dan body dikirim terpisah; tanpa TCP_NODELAY keep-alive tertahan ~40 ms (delayed ACK)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def read_json(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > API_MAX_BODY_BYTES:
+            # Body tidak dibaca, jadi sisanya di socket tidak boleh dianggap permintaan
+            # berikutnya; panjang negatif membuat rfile.read() menunggu sampai koneksi ditutup
+            self.close_connection = True
+            raise ValueError("Content-Length tidak valid" if length < 0 else "Body terlalu besar")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            raise ValueError("Body bukan JSON yang valid")
+        if not isinstance(body, dict):
+            raise ValueError("Body harus berupa objek JSON")
+        return body
+
+    def _dispatch(self, method):
+        path, _, query = self.path.partition('?')
+        self.query_params = parse_qs(query)
+        allowed = False
+        for route_method, pattern, route in API_ROUTES:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                status, payload = route(self, *match.groups())
+            except ValueError as e:
+                status, payload = 400, {'error': str(e)}
+            except Exception:
+                api_log.exception("Gagal memproses %s %s", method, self.path)
+                status, payload = 500, {'error': "Terjadi kesalahan pada server"}
+            return self._send_json(status, payload)
+        if allowed:
+            return self._send_json(405, {'error': f"Metode {method} tidak didukung"})
+        self._send_json(404, {'error': "Endpoint tidak ditemukan"})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        api_log.debug("%s - %s", self.address_string(), format % args)
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer dengan pool thread tetap (bukan thread baru per koneksi).
+
+    Thread pekerja hidup sepanjang server, sehingga koneksi SQLite per thread dari
+    db_sikampus dibuka sekali dan dipakai ulang oleh semua permintaan.
+    """
+
+    def __init__(self, address, handler_class, workers=API_WORKERS):
+        super().__init__(address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sikampus-api')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def create_api_server(host=API_HOST, port=API_PORT, workers=API_WORKERS):
+    """Menyiapkan skema dan membuat server API (port 0 = port bebas acak)."""
+    init_db()
+    return PooledHTTPServer((host, port), SikampusAPIHandler, workers)
+
+def serve_api(host=API_HOST, port=API_PORT, workers=API_WORKERS):
+    """Menjalankan server API sampai dihentikan (Ctrl+C)."""
+    server = create_api_server(host, port, workers)
+    api_log.info("API SIKAMPUS berjalan di http://%s:%s", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# bench_sikampus.py
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+import sqlite3
+import pandas as pd
+from api_sikampus import create_api_server
+from frames_sikampus import read_frame, REGISTRATION_FRAME, FRAME_CHUNK_SIZE
+from db_sikampus import (
+    init_db, set_database, scratch_database, execute_query, register_scholar, verify_slot_counters,
+    start_write_queue, stop_write_queue, submit_registration, percentile, write_transaction,
+    update_registration_status, bulk_update_registrations, update_module,
+    REG_REGISTERED, REG_WAITLISTED, WRITE_QUEUE_BATCH_SIZE, WRITE_QUEUE_FLUSH_MS, PROJECT_COST_PER_CREDIT,
+    QUERY_INSERT_REGISTRATION, QUERY_AVAILABLE_MODULES, QUERY_TOTAL_REGISTERED,
+    QUERY_OPEN_CAPACITY, QUERY_MONTHLY_FEE, KNOWN_QUERIES, rollup_trend_query, check_query_plans,
+    registration_filters, QUERY_REGISTRATION_LIST, QUERY_REGISTRATION_ORDER, REGISTRATION_PAGE_SIZE,
+    delete_module,
+)
+
+try:
+    from streamlit.testing.v1 import AppTest
+except ImportError:  # Perbandingan dengan jalur Streamlit bersifat opsional
+    AppTest = None
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main_sikampus.py')
+
+BENCH_SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+SYNTHETIC_PROGRAMS = [
+    'Informatika', 'Sistem Informasi', 'Teknik Elektro', 'Teknik Industri',
+    'Manajemen', 'Akuntansi', 'Statistika', 'Desain Komunikasi Visual',
+]
+SYNTHETIC_TOPICS = [
+    'Analisis Data', 'Kecerdasan Buatan', 'Infrastruktur Cloud', 'Keamanan Siber',
+    'Internet of Things', 'Sistem Tertanam', 'Riset Pasar', 'Audit Keuangan',
+    'Desain Produk', 'Optimasi Rantai Pasok', 'Visualisasi Data', 'Pengolahan Citra',
+]
+SYNTHETIC_CHUNK_SIZE = 50_000
+
+def stress_registration(students=500, workers=32, max_slots=25, modules=3):
+    """Uji beban registrasi serentak: tidak boleh ada modul yang melebihi max_slots.
+
+    Setiap akademisi mencoba mendaftar ke semua modul uji secara paralel. Mengembalikan
+    ringkasan hasil; kunci 'ok' bernilai False jika kapasitas terlampaui atau
+    penghitung slot tidak cocok dengan data mentah.
+    """
+    with scratch_database('stress') as path:
+        module_ids = [
+            execute_query(
+                "INSERT INTO Modules (module_code, title, credits, max_slots, status) VALUES (?, ?, ?, ?, ?)",
+                (f'STR{i:03d}', f'Modul Uji {i}', 3, max_slots, 'Open')
+            )
+            for i in range(modules)
+        ]
+        # Setiap percobaan dikirim dua kali untuk meniru klik ganda pada tombol submit
+        attempts = [
+            (module_id, f'S{n:06d}') for n in range(students) for module_id in module_ids
+        ] * 2
+
+        def attempt(args):
+            module_id, nim = args
+            outcome, _ = register_scholar(module_id, nim, f'Mahasiswa {nim}', f'{nim}@kampus.ac.id', 'Informatika')
+            return outcome
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = Counter(pool.map(attempt, attempts))
+        elapsed = time.perf_counter() - started
+
+        occupancy = execute_query(
+            "SELECT M.id, M.max_slots, COUNT(P.id) FROM Modules M "
+            "LEFT JOIN ProjectRegistrations P ON P.module_id = M.id AND P.status != 'Canceled' "
+            "WHERE M.module_code LIKE 'STR%' GROUP BY M.id",
+            fetch_all=True
+        )
+        oversubscribed = [row for row in occupancy if row[2] > row[1]]
+        counter_mismatches = verify_slot_counters()
+        return {
+            'database': path,
+            'attempts': len(attempts),
+            'seconds': round(elapsed, 3),
+            'outcomes': dict(outcomes),
+            'oversubscribed': oversubscribed,
+            'counter_mismatches': counter_mismatches,
+            'ok': (
+                not oversubscribed and not counter_mismatches
+                and outcomes[REG_REGISTERED] == min(students, max_slots) * modules
+            ),
+        }
+
+def stress_waitlist(students=300, workers=32, max_slots=20, modules=3, late_students=100, extra_slots=5, seed=42):
+    """Uji serentak daftar tunggu: tidak boleh ada kursi yang terisi dua kali.
+
+    Modul uji diisi sampai penuh (sisanya masuk antrean), lalu pembatalan satu per
+    satu, pembatalan massal, perubahan ke 'InProgress'/'Completed', penambahan
+    max_slots dan registrasi baru dijalankan paralel. Modul terpisah menguji antrean
+    kosong: perpindahan status tidak melepas kursi (pendaftar baru masuk antrean),
+    pembatalan mengosongkan antrean, pendaftar berikutnya langsung mendapat kursi
+    yang tersisa, dan registrasi batal tidak bisa diaktifkan kembali di modul penuh.
+    Setelahnya diperiksa: registrasi aktif per modul tidak melebihi max_slots, tidak
+    ada registrasi aktif ganda, akademisi aktif tidak tertinggal di antrean, tidak
+    ada kursi kosong selama antrean berisi, jumlah promosi per modul sama persis
+    dengan kursi yang dibatalkan/ditambah, dan promosi mengikuti urutan FIFO.
+    """
+    rng = random.Random(seed)
+    with scratch_database('waitlist') as path:
+        module_ids = [
+            execute_query(
+                "INSERT INTO Modules (module_code, title, credits, max_slots, status) VALUES (?, ?, ?, ?, ?)",
+                (f'WL{i:03d}', f'Modul Antrean {i}', 3, max_slots, 'Open')
+            )
+            for i in range(modules)
+        ]
+
+        def attempt(args):
+            module_id, nim = args
+            outcome, _ = register_scholar(module_id, nim, f'Mahasiswa {nim}', f'{nim}@kampus.ac.id', 'Informatika')
+            return outcome
+
+        # Tahap 1: pengisian serentak; yang tidak kebagian kursi masuk antrean
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fill_outcomes = Counter(pool.map(attempt, [
+                (module_id, f'W{n:06d}') for n in range(students) for module_id in module_ids
+            ]))
+        initial_queue = defaultdict(list)
+        for module_id, scholar_fk in execute_query(
+            "SELECT module_id, scholar_id_fk FROM Waitlist ORDER BY id", fetch_all=True
+        ):
+            initial_queue[module_id].append(scholar_fk)
+        seat_holders = execute_query(
+            "SELECT id, module_id FROM ProjectRegistrations WHERE status = 'Registered'", fetch_all=True
+        )
+
+        # Tahap 2: kursi dilepas dan ditambah sementara pendaftar baru terus datang;
+        # seperempat pemegang kursi dibatalkan satu per satu, seperempat massal, dan
+        # seperempat lagi hanya berpindah status (tidak boleh memicu promosi)
+        rng.shuffle(seat_holders)
+        quarter = len(seat_holders) // 4
+        singles = seat_holders[:quarter]
+        bulk = seat_holders[quarter:2 * quarter]
+        progressed = seat_holders[2 * quarter:3 * quarter]
+        operations = [('cancel', reg_id) for reg_id, _ in singles]
+        operations += [('bulk', [reg_id for reg_id, _ in bulk[i:i + 10]]) for i in range(0, len(bulk), 10)]
+        operations += [('progress', reg_id) for reg_id, _ in progressed[::2]]
+        operations += [('grade', [reg_id for reg_id, _ in progressed[1::2]])]
+        operations += [('grow', module_id) for module_id in module_ids]
+        operations += [('register', (rng.choice(module_ids), f'L{n:06d}')) for n in range(late_students)]
+        rng.shuffle(operations)
+        expected = Counter(module_id for _, module_id in singles + bulk)
+        for module_id in module_ids:
+            expected[module_id] = min(expected[module_id] + extra_slots, len(initial_queue[module_id]))
+
+        def run(operation):
+            kind, arg = operation
+            if kind == 'cancel':
+                return update_registration_status(arg, 'Canceled')
+            if kind == 'bulk':
+                return bulk_update_registrations([(reg_id, 'Canceled', None) for reg_id in arg])
+            if kind == 'progress':
+                return update_registration_status(arg, 'InProgress')
+            if kind == 'grade':
+                return bulk_update_registrations([(reg_id, 'Completed', 'A') for reg_id in arg])
+            if kind == 'grow':
+                with write_transaction() as conn:
+                    code, title, credits, slots, status = conn.execute(
+                        "SELECT module_code, title, credits, max_slots, status FROM Modules WHERE id = ?", (arg,)
+                    ).fetchone()
+                return update_module(arg, code, title, credits, slots + extra_slots, status)
+            return attempt(arg)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            late_outcomes = Counter(
+                outcome for (kind, _), outcome in zip(operations, pool.map(run, operations)) if kind == 'register'
+            )
+        elapsed = time.perf_counter() - started
+
+        # Tahap 3: modul dengan antrean kosong. Semua pemegang kursi berpindah status
+        # sementara pendaftar baru datang, lalu pembatalan mengosongkan antrean dan
+        # masih menyisakan extra_slots kursi untuk pendaftar berikutnya
+        drain_module = execute_query(
+            "INSERT INTO Modules (module_code, title, credits, max_slots, status) VALUES (?, ?, ?, ?, ?)",
+            ('WLE000', 'Modul Antrean Kosong', 3, max_slots, 'Open')
+        )
+        holders = [
+            register_scholar(drain_module, nim, f'Mahasiswa {nim}', f'{nim}@kampus.ac.id', 'Informatika')[1]
+            for nim in (f'E{n:06d}' for n in range(max_slots))
+        ]
+        queued = 2 * extra_slots
+        transitions = [('progress', reg_id) for reg_id in holders[::2]] + [('grade', holders[1::2])]
+        transitions += [('register', (drain_module, f'Q{n:06d}')) for n in range(queued)]
+        rng.shuffle(transitions)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            transition_outcomes = Counter(
+                outcome for (kind, _), outcome in zip(transitions, pool.map(run, transitions)) if kind == 'register'
+            )
+        canceled = holders[:queued + extra_slots]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, [('cancel', reg_id) for reg_id in canceled]))
+        drained_queue = execute_query("SELECT COUNT(*) FROM Waitlist WHERE module_id = ?", (drain_module,))[0]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            refill_outcomes = Counter(pool.map(attempt, [(drain_module, f'R{n:06d}') for n in range(queued)]))
+        try:
+            update_registration_status(canceled[0], 'InProgress')
+            reactivation_refused = False
+        except ValueError:
+            reactivation_refused = True
+
+        oversubscribed = execute_query(
+            "SELECT M.id, M.max_slots, COUNT(P.id) FROM Modules M "
+            "JOIN ProjectRegistrations P ON P.module_id = M.id AND P.status != 'Canceled' "
+            "GROUP BY M.id HAVING COUNT(P.id) > M.max_slots",
+            fetch_all=True
+        )
+        double_assigned = execute_query(
+            "SELECT module_id, scholar_id_fk, COUNT(*) FROM ProjectRegistrations WHERE status != 'Canceled' "
+            "GROUP BY module_id, scholar_id_fk HAVING COUNT(*) > 1",
+            fetch_all=True
+        )
+        active_and_waiting = execute_query(
+            "SELECT COUNT(*) FROM Waitlist W JOIN ProjectRegistrations P "
+            "ON P.module_id = W.module_id AND P.scholar_id_fk = W.scholar_id_fk AND P.status != 'Canceled'"
+        )[0]
+        idle_seats = execute_query(
+            "SELECT M.id, M.max_slots, M.registered_count FROM Modules M WHERE M.registered_count < M.max_slots "
+            "AND EXISTS (SELECT 1 FROM Waitlist W WHERE W.module_id = M.id)",
+            fetch_all=True
+        )
+        # FIFO: dari antrean awal, yang dipromosikan harus membentuk awalan urutan antrean
+        still_waiting = {tuple(row) for row in execute_query("SELECT module_id, scholar_id_fk FROM Waitlist", fetch_all=True)}
+        fifo_violations = []
+        promotions = Counter()
+        for module_id, queue_order in initial_queue.items():
+            promoted = [(module_id, scholar_fk) not in still_waiting for scholar_fk in queue_order]
+            promotions[module_id] = sum(promoted)
+            if promoted != sorted(promoted, reverse=True):
+                fifo_violations.append(module_id)
+        promotion_mismatches = [
+            (module_id, promotions[module_id], expected[module_id])
+            for module_id in module_ids if promotions[module_id] != expected[module_id]
+        ]
+        counter_mismatches = verify_slot_counters()
+        return {
+            'database': path,
+            'fill_outcomes': dict(fill_outcomes),
+            'late_outcomes': dict(late_outcomes),
+            'operations': len(operations),
+            'seconds': round(elapsed, 3),
+            'promoted_from_initial_queue': sum(promotions.values()),
+            'still_waiting': len(still_waiting),
+            'oversubscribed': oversubscribed,
+            'double_assigned': double_assigned,
+            'active_and_waiting': active_and_waiting,
+            'idle_seats': idle_seats,
+            'empty_queue': {
+                'transition_outcomes': dict(transition_outcomes),
+                'drained_queue': drained_queue,
+                'refill_outcomes': dict(refill_outcomes),
+                'reactivation_refused': reactivation_refused,
+            },
+            'promotion_mismatches': promotion_mismatches,
+            'fifo_violations': fifo_violations,
+            'counter_mismatches': counter_mismatches,
+            'ok': (
+                not oversubscribed and not double_assigned and not active_and_waiting and not idle_seats
+                and not promotion_mismatches and not fifo_violations and not counter_mismatches
+                and fill_outcomes[REG_REGISTERED] == min(students, max_slots) * modules
+                and fill_outcomes[REG_WAITLISTED] == max(students - max_slots, 0) * modules
+                and transition_outcomes == {REG_WAITLISTED: queued} and drained_queue == 0
+                and refill_outcomes == {REG_REGISTERED: extra_slots, REG_WAITLISTED: extra_slots}
+                and reactivation_refused
+            ),
+        }
+
+def _run_registration_burst(register, requests, workers):
+    """Menjalankan `requests` registrasi paralel; mengembalikan throughput dan latensi."""
+    module_id = execute_query(
+        "INSERT INTO Modules (module_code, title, credits, max_slots, status) VALUES (?, ?, ?, ?, ?)",
+        ('BURST', 'Modul Lonjakan', 3, requests, 'Open')
+    )
+    latencies = []
+    errors = Counter()
+
+    def attempt(n):
+        nim = f'B{n:07d}'
+        started = time.perf_counter()
+        try:
+            register(module_id, nim, f'Mahasiswa {nim}', f'{nim}@kampus.ac.id', 'Informatika')
+        except Exception as e:
+            errors[type(e).__name__ + ': ' + str(e)] += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(attempt, range(requests)))
+    elapsed = time.perf_counter() - started
+    return dict(_latency_report(latencies, elapsed), errors=dict(errors))
+
+def _latency_report(latencies, elapsed):
+    """Throughput dan persentil latensi (ms) dari sekumpulan permintaan."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms_p50': round(percentile(latencies, 0.50), 2),
+        'latency_ms_p95': round(percentile(latencies, 0.95), 2),
+        'latency_ms_p99': round(percentile(latencies, 0.99), 2),
+    }
+
+def bench_group_commit(requests=2000, workers=64, batch_size=WRITE_QUEUE_BATCH_SIZE, flush_interval_ms=WRITE_QUEUE_FLUSH_MS):
+    """Membandingkan commit per permintaan dengan group commit lewat antrean tulis."""
+    # Selalu di disk: yang dibandingkan justru biaya commit ke file WAL
+    with scratch_database('per_request', in_memory=False):
+        per_request = _run_registration_burst(register_scholar, requests, workers)
+
+    with scratch_database('group_commit', in_memory=False):
+        writer = start_write_queue(batch_size, flush_interval_ms)
+        try:
+            group_commit = _run_registration_burst(
+                lambda *args: submit_registration(*args).result(), requests, workers
+            )
+            group_commit['batches'] = writer.batches_committed
+        finally:
+            stop_write_queue()
+    return {'per_request_commit': per_request, 'group_commit': group_commit}
+
+def _time_streamlit_reruns(runs):
+    """Durasi satu rerun penuh main_sikampus.py (jalur Streamlit), None bila tidak tersedia."""
+    if AppTest is None:
+        return None
+    app = AppTest.from_file(MAIN_SCRIPT, default_timeout=60)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(runs):
+        run_started = time.perf_counter()
+        app.run()
+        latencies.append((time.perf_counter() - run_started) * 1000)
+    return _latency_report(latencies, time.perf_counter() - started)
+
+def bench_api(requests=5000, concurrency=16, registrations=10_000, streamlit_runs=20, seed=42):
+    """Uji beban API JSON dengan klien HTTP keep-alive lokal, dibandingkan dengan rerun Streamlit.
+
+    Campuran permintaan: 60% katalog, 25% cek status registrasi, 15% registrasi baru.
+    """
+    with scratch_database('api'):
+        generate_synthetic_data(registrations, seed)
+        reg_ids = [row[0] for row in execute_query("SELECT id FROM ProjectRegistrations", fetch_all=True)]
+        module_ids = [row[0] for row in execute_query(QUERY_AVAILABLE_MODULES, fetch_all=True)]
+
+        server = create_api_server('127.0.0.1', 0, workers=concurrency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+
+        latencies = defaultdict(list)
+        statuses = Counter()
+        lock = threading.Lock()
+
+        def client(worker):
+            rng = random.Random(seed + worker)
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            measured = []
+            try:
+                for n in range(worker, requests, concurrency):
+                    roll = rng.random()
+                    if roll < 0.60:
+                        route, method, path, body = 'catalog', 'GET', '/api/modules', None
+                    elif roll < 0.85:
+                        route, method, path, body = 'status', 'GET', f'/api/registrations/{rng.choice(reg_ids)}', None
+                    else:
+                        nim = f'A{n:08d}'
+                        route, method, path = 'register', 'POST', '/api/registrations'
+                        body = json.dumps({
+                            'module_id': rng.choice(module_ids), 'scholar_id': nim, 'name': f'API {n}',
+                            'email': f'{nim}@api.ac.id', 'program': 'Informatika',
+                        })
+                    started = time.perf_counter()
+                    conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+                    response = conn.getresponse()
+                    response.read()
+                    measured.append((route, response.status, (time.perf_counter() - started) * 1000))
+            finally:
+                conn.close()
+            with lock:
+                for route, status, ms in measured:
+                    latencies[route].append(ms)
+                    statuses[status] += 1
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(client, range(concurrency)))
+            elapsed = time.perf_counter() - started
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        all_latencies = [ms for route_latencies in latencies.values() for ms in route_latencies]
+        return {
+            'api': dict(_latency_report(all_latencies, elapsed), concurrency=concurrency, status_codes=dict(statuses)),
+            'api_by_route': {
+                route: {
+                    'requests': len(route_latencies),
+                    'latency_ms_p50': round(percentile(sorted(route_latencies), 0.50), 2),
+                    'latency_ms_p95': round(percentile(sorted(route_latencies), 0.95), 2),
+                    'latency_ms_p99': round(percentile(sorted(route_latencies), 0.99), 2),
+                }
+                for route, route_latencies in latencies.items()
+            },
+            'streamlit_rerun': _time_streamlit_reruns(streamlit_runs),
+        }
+
+def bench_frames(registrations=200_000, seed=42, chunk_size=FRAME_CHUNK_SIZE):
+    """Membandingkan DataFrame dari list tuple (kolom object) dengan pemuatan bertipe per potongan.
+
+    Mengukur waktu muat, ukuran DataFrame (memory_usage deep), puncak alokasi Python
+    (tracemalloc) dan waktu filter + sort seperti di tabel staf.
+    """
+    with scratch_database('frames'):
+        generate_synthetic_data(registrations, seed)
+        query = QUERY_REGISTRATION_LIST + QUERY_REGISTRATION_ORDER
+        columns = [name for name, _ in REGISTRATION_FRAME]
+        loaders = {
+            'tuples_object': lambda: pd.DataFrame(execute_query(query, fetch_all=True), columns=columns),
+            'typed_chunked': lambda: read_frame(query, (), REGISTRATION_FRAME, chunk_size),
+        }
+
+        results = {}
+        for label, load in loaders.items():
+            started = time.perf_counter()
+            frame = load()
+            load_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            frame[frame['status'] == 'Completed'].sort_values(['module_code', 'reg_date'])
+            filter_sort_ms = (time.perf_counter() - started) * 1000
+
+            frame_mb = frame.memory_usage(deep=True).sum() / 1e6
+            dtypes = {column: str(dtype) for column, dtype in frame.dtypes.items()}
+            del frame
+            tracemalloc.start()
+            try:
+                load()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            results[label] = {
+                'rows': registrations,
+                'load_seconds': round(load_seconds, 3),
+                'frame_mb': round(frame_mb, 2),
+                'peak_python_mb': round(peak / 1e6, 2),
+                'filter_sort_ms': round(filter_sort_ms, 2),
+                'dtypes': dtypes,
+            }
+        return results
+
+def _legacy_init_db(database):
+    """Tiruan init_db lama: tiga CREATE TABLE, COUNT(*) dan dua kali connect/close per rerun."""
+    conn = sqlite3.connect(database)
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS Modules (id INTEGER PRIMARY KEY, module_code TEXT NOT NULL UNIQUE, title TEXT NOT NULL, credits INTEGER NOT NULL, max_slots INTEGER NOT NULL, status TEXT NOT NULL CHECK(status IN ('Open', 'Closed')))")
+    cursor.execute("CREATE TABLE IF NOT EXISTS Scholars (id INTEGER PRIMARY KEY, scholar_id TEXT NOT NULL UNIQUE, name TEXT NOT NULL, contact_email TEXT NOT NULL, program TEXT NOT NULL)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS ProjectRegistrations (id INTEGER PRIMARY KEY, module_id INTEGER, scholar_id_fk INTEGER, reg_date TEXT NOT NULL, total_fee REAL NOT NULL, status TEXT NOT NULL, final_score TEXT)")
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(database)
+    conn.execute("SELECT COUNT(*) FROM Modules").fetchone()
+    conn.close()
+
+def bench_startup(reruns=500):
+    """Mengukur biaya inisialisasi database per rerun: init_db lama vs run-once + migrasi."""
+    with scratch_database('startup', in_memory=False) as path:  # Tiruan init_db lama membuka file
+
+        started = time.perf_counter()
+        for _ in range(reruns):
+            _legacy_init_db(path)
+        legacy = (time.perf_counter() - started) / reruns
+
+        # Init pertama di proses: file baru tanpa skema, semua migrasi dijalankan
+        set_database(os.path.join(os.path.dirname(path), 'startup_fresh.sqlite'))
+        started = time.perf_counter()
+        init_db(force=True)
+        first_run = time.perf_counter() - started
+
+        # Init pertama di proses untuk file yang skemanya sudah mutakhir
+        set_database(path)
+        started = time.perf_counter()
+        init_db(force=True)
+        first_run_migrated = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(reruns):
+            init_db()
+        run_once = (time.perf_counter() - started) / reruns
+
+        return {
+            'reruns': reruns,
+            'legacy_init_per_rerun_us': round(legacy * 1e6, 2),
+            'first_init_in_process_us': round(first_run * 1e6, 2),
+            'first_init_migrated_file_us': round(first_run_migrated * 1e6, 2),
+            'run_once_init_per_rerun_us': round(run_once * 1e6, 2),
+            'saved_per_rerun_us': round((legacy - run_once) * 1e6, 2),
+        }
+
+def generate_synthetic_data(registrations=1_000, seed=42, history_days=730):
+    """Mengisi Modules, Scholars dan ProjectRegistrations dengan data sintetis yang deterministik.
+
+    Registrasi lama (> 180 hari) kebanyakan Completed/Canceled, registrasi baru kebanyakan
+    Registered/InProgress. Setiap akademisi mengambil 1-5 modul berbeda, dan max_slots
+    modul disesuaikan agar tidak ada modul yang melebihi kapasitas.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    module_count = max(10, registrations // 1_000)
+    started = time.perf_counter()
+
+    # Nomor urut dilanjutkan dari data yang ada agar generator bisa dijalankan berulang
+    module_offset = execute_query("SELECT COUNT(*) FROM Modules")[0]
+    scholar_offset = execute_query("SELECT COUNT(*) FROM Scholars")[0]
+
+    modules = [
+        (
+            f'SYN{module_offset + i:05d}',
+            f'Proyek {SYNTHETIC_TOPICS[i % len(SYNTHETIC_TOPICS)]} {i // len(SYNTHETIC_TOPICS) + 1}',
+            rng.randint(2, 6), 1, 'Open' if rng.random() < 0.8 else 'Closed',
+        )
+        for i in range(module_count)
+    ]
+    with write_transaction() as conn:
+        first_module_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM Modules").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO Modules (module_code, title, credits, max_slots, status) VALUES (?, ?, ?, ?, ?)", modules
+        )
+        module_rows = conn.execute(
+            "SELECT id, credits FROM Modules WHERE id >= ? ORDER BY id", (first_module_id,)
+        ).fetchall()
+
+    scholars_created = 0
+    created = 0
+    while created < registrations:
+        scholar_batch = []
+        registration_batch = []
+        while created < registrations and len(registration_batch) < SYNTHETIC_CHUNK_SIZE:
+            nim = f'{20 + scholars_created % 6:02d}{scholar_offset + scholars_created:08d}'
+            scholar_batch.append((
+                nim, f'Mahasiswa Sintetis {scholars_created}', f'{nim}@mahasiswa.ac.id',
+                rng.choice(SYNTHETIC_PROGRAMS),
+            ))
+            scholars_created += 1
+            taken = min(rng.randint(1, 5), registrations - created, len(module_rows))
+            for module_id, credits in rng.sample(module_rows, taken):
+                reg_date = now - timedelta(seconds=rng.randint(0, history_days * 86400))
+                if (now - reg_date).days > 180:
+                    status = 'Completed' if rng.random() < 0.8 else 'Canceled'
+                else:
+                    status = rng.choices(['Registered', 'InProgress', 'Canceled'], [0.6, 0.3, 0.1])[0]
+                score = rng.choices('ABCDE', [0.3, 0.35, 0.2, 0.1, 0.05])[0] if status == 'Completed' else None
+                registration_batch.append((
+                    module_id, nim, reg_date.strftime('%Y-%m-%d %H:%M:%S'),
+                    credits * PROJECT_COST_PER_CREDIT, status, score,
+                ))
+            created += taken
+
+        with write_transaction() as conn:
+            first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM Scholars").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO Scholars (scholar_id, name, contact_email, program) VALUES (?, ?, ?, ?)", scholar_batch
+            )
+            scholar_ids = {nim: first_id + offset for offset, (nim, *_) in enumerate(scholar_batch)}
+            conn.executemany(
+                QUERY_INSERT_REGISTRATION,
+                [(module_id, scholar_ids[nim], *rest) for module_id, nim, *rest in registration_batch]
+            )
+
+    # Kapasitas = slot terisi + sisa acak, agar katalog tetap punya modul yang tersedia
+    with write_transaction() as conn:
+        occupancy = conn.execute(
+            "SELECT id, registered_count FROM Modules WHERE id >= ? ORDER BY id", (first_module_id,)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE Modules SET max_slots = ? WHERE id = ?",
+            [(registered + rng.randint(5, 25), module_id) for module_id, registered in occupancy]
+        )
+    return {
+        'modules': module_count,
+        'scholars': scholars_created,
+        'registrations': created,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+def _time_workload(workload, iterations):
+    timings = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        workload(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scale='1k', seed=42, iterations=50):
+    """Menjalankan beban kerja nyata SIKAMPUS tanpa Streamlit pada data sintetis.
+
+    Kueri dijalankan lewat execute_query (tanpa cache baca) agar yang diukur adalah
+    biaya database sebenarnya. Mengembalikan dict yang siap disimpan sebagai JSON.
+    """
+    registrations = BENCH_SCALES.get(scale) or int(scale)
+    with scratch_database(f'bench_{scale}') as path:
+        generated = generate_synthetic_data(registrations, seed)
+        rng = random.Random(seed)
+        open_modules = [row[0] for row in execute_query(
+            "SELECT id FROM Modules WHERE status = 'Open' AND module_code LIKE 'SYN%' ORDER BY id", fetch_all=True
+        )]
+        current_month = datetime.now().strftime('%Y-%m')
+        page_query, page_params = KNOWN_QUERIES['registration_page']
+        seek_query, _ = KNOWN_QUERIES['registration_page_seek']
+        middle = execute_query(
+            "SELECT reg_date, id FROM ProjectRegistrations ORDER BY reg_date DESC, id DESC LIMIT 1 OFFSET ?",
+            (registrations // 2,)
+        )
+        # SQL rollup mentah: fetch_rollup_trend di-cache sehingga hanya mengukur hit cache
+        trend_query, trend_params = rollup_trend_query('module', 12)
+        scholar_count = execute_query("SELECT MAX(id) FROM Scholars")[0]
+        search_nims = [
+            execute_query("SELECT scholar_id FROM Scholars WHERE id >= ? LIMIT 1", (rng.randint(1, scholar_count),))[0]
+            for _ in range(iterations)
+        ]
+
+        def register(i):
+            nim = f'BENCH{i:05d}'
+            register_scholar(rng.choice(open_modules), nim, f'Bench {i}', f'{nim}@bench.ac.id', 'Informatika')
+
+        def remove_module(i):
+            # Sama dengan tombol "Hapus Permanen" di Kelola Modul
+            delete_module(deletable_modules[i])
+
+        def search_registrations(i):
+            # Sama dengan kotak "Cari" di Daftar Registrasi (halaman pertama)
+            clauses, params = registration_filters(search=search_nims[i])
+            execute_query(
+                QUERY_REGISTRATION_LIST + " WHERE " + " AND ".join(clauses) + QUERY_REGISTRATION_ORDER + " LIMIT ?",
+                params + [REGISTRATION_PAGE_SIZE], fetch_all=True
+            )
+
+        workloads = {
+            'catalog_available_modules': (lambda i: execute_query(QUERY_AVAILABLE_MODULES, fetch_all=True), iterations),
+            'register_scholar': (register, iterations),
+            'metrics_total_registered': (lambda i: execute_query(QUERY_TOTAL_REGISTERED), iterations),
+            'metrics_open_capacity': (lambda i: execute_query(QUERY_OPEN_CAPACITY), iterations),
+            'metrics_monthly_fee': (lambda i: execute_query(QUERY_MONTHLY_FEE, (current_month,)), iterations),
+            'metrics_monthly_trend': (lambda i: execute_query(trend_query, trend_params, fetch_all=True), iterations),
+            'registrations_first_page': (lambda i: execute_query(page_query, page_params, fetch_all=True), iterations),
+            'registrations_seek_page': (
+                lambda i: execute_query(seek_query, (*middle, page_params[0]), fetch_all=True), iterations
+            ),
+            'registrations_count': (lambda i: execute_query("SELECT COUNT(*) FROM ProjectRegistrations"), iterations),
+            'registrations_search': (search_registrations, iterations),
+        }
+        results = {name: _time_workload(workload, count) for name, (workload, count) in workloads.items()}
+
+        deletable_modules = rng.sample(open_modules, min(5, len(open_modules)))
+        results['module_delete'] = _time_workload(remove_module, len(deletable_modules))
+
+        # Rencana kueri diperiksa ulang pada data sintetis, bukan hanya pada skema kosong
+        try:
+            query_plans = 'ok' if check_query_plans() else None
+        except RuntimeError as e:
+            query_plans = str(e)
+
+        return {
+            'scale': scale,
+            'seed': seed,
+            'database': path,
+            'generated': generated,
+            'git_commit': _git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'query_plans': query_plans,
+            'workloads': results,
+        }
+
+# cli_sikampus.py
+import argparse
+import json
+import sys
+import time
+import db_sikampus
+from db_sikampus import (
+    init_db, set_database, use_memory_database, execute_query, explain_query, check_query_plans, KNOWN_QUERIES,
+    rebuild_slot_counters, verify_slot_counters, migrate, schema_version, SCHEMA_VERSION,
+    rebuild_rollups, verify_rollups, archive_registrations, count_archivable, semester_start,
+    start_write_queue, DATABASE_NAME, PERSIST_INTERVAL_S,
+)
+from bench_sikampus import (
+    stress_registration, stress_waitlist, bench_group_commit, bench_startup, generate_synthetic_data, run_benchmarks,
+    bench_api, bench_frames, BENCH_SCALES,
+)
+from api_sikampus import serve_api, API_HOST, API_PORT, API_WORKERS
+from import_sikampus import import_scholars, import_registrations, import_grade_sheet, IMPORT_CHUNK_SIZE
+from export_sikampus import export_registrations, EXPORT_FORMATS, EXPORT_CHUNK_SIZE
+
+def main(argv=None):
+    """Perintah baris SIKAMPUS untuk tugas pemeliharaan tanpa Streamlit."""
+    parser = argparse.ArgumentParser(description="Alat bantu SIKAMPUS")
+    parser.add_argument('--db', help="Path atau URI 'file:' database (default: sikampus_db.sqlite)")
+    parser.add_argument(
+        '--disk-scratch', action='store_true', help="Uji & benchmark memakai file sementara, bukan database memori"
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('check-plans', help="Periksa EXPLAIN QUERY PLAN semua kueri utama")
+    counters_parser = subparsers.add_parser('slot-counters', help="Verifikasi penghitung slot modul")
+    counters_parser.add_argument('--rebuild', action='store_true', help="Hitung ulang sebelum verifikasi")
+    rollups_parser = subparsers.add_parser('rollups', help="Verifikasi tabel rollup bulanan")
+    rollups_parser.add_argument('--rebuild', action='store_true', help="Backfill ulang sebelum verifikasi")
+    stress_parser = subparsers.add_parser('stress', help="Uji beban registrasi serentak (database sementara)")
+    stress_parser.add_argument('--students', type=int, default=500)
+    stress_parser.add_argument('--workers', type=int, default=32)
+    stress_parser.add_argument('--max-slots', type=int, default=25)
+    waitlist_parser = subparsers.add_parser('stress-waitlist', help="Uji serentak promosi daftar tunggu (database sementara)")
+    waitlist_parser.add_argument('--students', type=int, default=300)
+    waitlist_parser.add_argument('--workers', type=int, default=32)
+    waitlist_parser.add_argument('--max-slots', type=int, default=20)
+    waitlist_parser.add_argument('--seed', type=int, default=42)
+    writes_parser = subparsers.add_parser('bench-writes', help="Benchmark commit per permintaan vs group commit")
+    writes_parser.add_argument('--requests', type=int, default=2000)
+    writes_parser.add_argument('--workers', type=int, default=64)
+    writes_parser.add_argument('--batch-size', type=int, default=32)
+    writes_parser.add_argument('--flush-ms', type=float, default=5)
+    subparsers.add_parser('migrate', help="Jalankan migrasi skema yang tertunda")
+    generate_parser = subparsers.add_parser('generate', help="Isi database dengan data sintetis")
+    generate_parser.add_argument('--registrations', type=int, default=1_000)
+    generate_parser.add_argument('--seed', type=int, default=42)
+    bench_parser = subparsers.add_parser('bench', help="Benchmark beban kerja utama (JSON)")
+    bench_parser.add_argument('--scale', default='1k', help=f"{', '.join(BENCH_SCALES)} atau jumlah registrasi")
+    bench_parser.add_argument('--seed', type=int, default=42)
+    bench_parser.add_argument('--iterations', type=int, default=50)
+    bench_parser.add_argument('--output', help="Simpan hasil JSON ke file ini")
+    startup_parser = subparsers.add_parser('bench-startup', help="Benchmark biaya inisialisasi per rerun")
+    startup_parser.add_argument('--reruns', type=int, default=500)
+    import_parser = subparsers.add_parser('import', help="Impor CSV akademisi, registrasi atau lembar nilai")
+    import_parser.add_argument('kind', choices=['scholars', 'registrations', 'grades'])
+    import_parser.add_argument('path')
+    import_parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+    export_parser = subparsers.add_parser('export', help="Ekspor registrasi ke CSV/Parquet/Arrow")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    export_parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+    export_parser.add_argument('--status')
+    export_parser.add_argument('--module-code')
+    export_parser.add_argument('--program')
+    export_parser.add_argument('--from', dest='date_from', help="YYYY-MM-DD (inklusif)")
+    export_parser.add_argument('--to', dest='date_to', help="YYYY-MM-DD (inklusif)")
+    export_parser.add_argument('--search', help="Teks pencarian akademisi/modul")
+    export_parser.add_argument('--include-archive', action='store_true', help="Sertakan registrasi arsip")
+    archive_parser = subparsers.add_parser('archive', help="Arsipkan registrasi Completed/Canceled semester lalu")
+    archive_parser.add_argument('--before', help="YYYY-MM-DD (bawaan: awal semester ini)")
+    archive_parser.add_argument('--dry-run', action='store_true', help="Hanya hitung, jangan pindahkan")
+    api_parser = subparsers.add_parser('serve-api', help="Jalankan API JSON (katalog, registrasi, status)")
+    api_parser.add_argument('--host', default=API_HOST)
+    api_parser.add_argument('--port', type=int, default=API_PORT)
+    api_parser.add_argument('--workers', type=int, default=API_WORKERS)
+    api_parser.add_argument('--write-queue', action='store_true', help="Registrasi lewat penulis group-commit")
+    api_parser.add_argument('--memory', action='store_true', help="Sajikan dari RAM; dimuat dari --db dan disimpan berkala")
+    api_parser.add_argument('--persist-interval', type=float, default=PERSIST_INTERVAL_S, help="Detik antar penyimpanan (--memory)")
+    bench_api_parser = subparsers.add_parser('bench-api', help="Uji beban API JSON vs rerun Streamlit (database sementara)")
+    bench_api_parser.add_argument('--requests', type=int, default=5000)
+    bench_api_parser.add_argument('--concurrency', type=int, default=16)
+    bench_api_parser.add_argument('--registrations', type=int, default=10_000)
+    bench_api_parser.add_argument('--streamlit-runs', type=int, default=20)
+    frames_parser = subparsers.add_parser('bench-frames', help="Memori & waktu DataFrame bertipe vs object (database sementara)")
+    frames_parser.add_argument('--registrations', type=int, default=200_000)
+    frames_parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        set_database(args.db)
+    if args.disk_scratch:
+        db_sikampus.SCRATCH_IN_MEMORY = False
+
+    if args.command == 'stress':
+        report = stress_registration(args.students, args.workers, args.max_slots)
+        print(json.dumps(report, indent=2))
+        return 0 if report['ok'] else 1
+
+    if args.command == 'stress-waitlist':
+        report = stress_waitlist(args.students, args.workers, args.max_slots, seed=args.seed)
+        print(json.dumps(report, indent=2))
+        return 0 if report['ok'] else 1
+
+    if args.command == 'bench-writes':
+        report = bench_group_commit(args.requests, args.workers, args.batch_size, args.flush_ms)
+        print(json.dumps(report, indent=2))
+        return 0
+
+    if args.command == 'bench':
+        report = run_benchmarks(args.scale, args.seed, args.iterations)
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as result_file:
+                result_file.write(output)
+        print(output)
+        return 0
+
+    if args.command == 'bench-startup':
+        print(json.dumps(bench_startup(args.reruns), indent=2))
+        return 0
+
+    if args.command == 'bench-frames':
+        print(json.dumps(bench_frames(args.registrations, args.seed), indent=2))
+        return 0
+
+    if args.command == 'bench-api':
+        report = bench_api(args.requests, args.concurrency, args.registrations, args.streamlit_runs)
+        print(json.dumps(report, indent=2))
+        return 0
+
+    if args.command == 'serve-api':
+        if args.memory:
+            database_file = args.db or DATABASE_NAME
+            use_memory_database(load_from=database_file, persist_to=database_file, persist_interval_s=args.persist_interval)
+            print(f"Database di RAM, disimpan ke {database_file} setiap {args.persist_interval:g} detik")
+        if args.write_queue:
+            start_write_queue()
+        print(f"API SIKAMPUS di http://{args.host}:{args.port} (Ctrl+C untuk berhenti)")
+        serve_api(args.host, args.port, args.workers)
+        return 0
+
+    if args.command == 'migrate':
+        applied = migrate()
+        print(f"Migrasi diterapkan: {applied or 'tidak ada'}; versi skema {schema_version()}/{SCHEMA_VERSION}")
+        return 0
+
+    init_db()
+
+    if args.command == 'generate':
+        print(json.dumps(generate_synthetic_data(args.registrations, args.seed), indent=2))
+
+    if args.command == 'check-plans':
+        for name, (query, params) in KNOWN_QUERIES.items():
+            print(f"{name}: {' | '.join(explain_query(query, params))}")
+        try:
+            check_query_plans()
+        except RuntimeError as e:
+            print(f"GAGAL: {e}")
+            return 1
+        print("OK: semua kueri memakai indeks.")
+
+    elif args.command == 'slot-counters':
+        if args.rebuild:
+            rebuild_slot_counters()
+        mismatches = verify_slot_counters()
+        for module_id, code, counter, actual in mismatches:
+            print(f"Modul {module_id} ({code}): penghitung={counter}, sebenarnya={actual}")
+        if mismatches:
+            return 1
+        print("OK: semua penghitung slot akurat.")
+
+    elif args.command == 'rollups':
+        if args.rebuild:
+            rebuild_rollups()
+        mismatches = verify_rollups()
+        for kind, month, module_id, program, status, registrations, total_fee in mismatches:
+            print(f"{kind}: {month} modul={module_id} program={program} status={status} n={registrations} fee={total_fee}")
+        if mismatches:
+            return 1
+        print("OK: rollup bulanan akurat.")
+
+    elif args.command == 'archive':
+        before = args.before or semester_start()
+        if args.dry_run:
+            print(f"{count_archivable(before)} registrasi akan diarsipkan (sebelum {before})")
+            return 0
+        started = time.perf_counter()
+        moved = archive_registrations(before)
+        print(f"{moved} registrasi diarsipkan (sebelum {before}, {time.perf_counter() - started:.2f} detik)")
+
+    elif args.command == 'import':
+        importer = {
+            'scholars': import_scholars,
+            'registrations': import_registrations,
+            'grades': import_grade_sheet,
+        }[args.kind]
+        started = time.perf_counter()
+        report = importer(args.path, args.chunk_size)
+        for line_no, message in report['errors']:
+            print(f"Baris {line_no}: {message}")
+        saved = f"{report['changed']} berubah" if 'changed' in report else f"{report['inserted']} disimpan"
+        if report.get('waitlisted'):
+            saved += f", {report['waitlisted']} masuk daftar tunggu"
+        print(
+            f"{report['rows']} baris dibaca, {saved}, "
+            f"{report['skipped']} dilewati, {report['error_count']} error "
+            f"({time.perf_counter() - started:.2f} detik)"
+        )
+        return 1 if report['error_count'] else 0
+
+    elif args.command == 'export':
+        module_id = None
+        if args.module_code:
+            module = execute_query("SELECT id FROM Modules WHERE module_code = ?", (args.module_code,))
+            if module is None:
+                print(f"Kode modul tidak dikenal: {args.module_code}")
+                return 1
+            module_id = module[0]
+        summary = export_registrations(
+            args.path, args.format, args.chunk_size, status=args.status, module_id=module_id,
+            program=args.program, date_from=args.date_from, date_to=args.date_to, search=args.search,
+            include_archive=args.include_archive,
+        )
+        for code, fee in sorted(summary['fee_by_module'].items()):
+            print(f"{code}: Rp {fee:,.0f}")
+        print(f"{summary['rows']} registrasi diekspor ke {args.path}, total fee Rp {summary['total_fee']:,.0f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())